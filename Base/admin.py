@@ -1,5 +1,118 @@
 from django.contrib import admin
+from django.core.paginator import Paginator
+from django.http import StreamingHttpResponse
+from django.utils.cache import patch_vary_headers
+from django.db.models import Max
+from django.utils.functional import cached_property
+
+from Base import exports
 from Base.models import contact
 
 # Register your models here.
-admin.site.register(contact)
\ No newline at end of file
+
+CURSOR_PARAM = 'before'
+
+
+class KeysetPaginator(Paginator):
+    """
+    Paginator that never issues OFFSET, nor COUNT(*) over the whole table.
+
+    When the first page is not full, the count is exact. For an unfiltered
+    listing it is estimated as the highest primary key, which is cheap to read
+    from the index and never lower than the real count. Searches and cursor
+    pages are counted exactly up to FILTERED_COUNT_LIMIT rows. Only the first
+    page is ever served; later pages are reached with a keyset cursor instead.
+    """
+
+    FILTERED_COUNT_LIMIT = 1000
+
+    @cached_property
+    def rows(self):
+        return list(self.object_list[:self.per_page])
+
+    @cached_property
+    def count(self):
+        if len(self.rows) < self.per_page:
+            return len(self.rows)
+        if not self.object_list.query.where:
+            return self.object_list.aggregate(estimate=Max('pk'))['estimate'] or 0
+        # COUNT over a LIMIT subquery reads at most FILTERED_COUNT_LIMIT rows.
+        return self.object_list[:self.FILTERED_COUNT_LIMIT].count()
+
+    def validate_number(self, number):
+        return 1
+
+    def page(self, number):
+        return self._get_page(self.rows, 1, self)
+
+
+@admin.register(contact)
+class ContactAdmin(admin.ModelAdmin):
+    change_list_template = 'admin/Base/contact/change_list.html'
+    list_display = ('id', 'created_at', 'name', 'email', 'number')
+    list_display_links = ('id', 'name')
+    ordering = ('-pk',)
+    # Any other ordering would defeat the keyset cursor.
+    sortable_by = ()
+    list_per_page = 50
+    paginator = KeysetPaginator
+    show_full_result_count = False
+    search_fields = ('email',)
+    search_help_text = 'Exact email address, or the start of one.'
+    actions = ['export_csv', 'export_jsonl']
+
+    def get_search_results(self, request, queryset, search_term):
+        # Only indexed lookups: an exact match, or a range scan for a prefix,
+        # never LIKE '%...%'.
+        term = search_term.strip()
+        if not term:
+            return queryset, False
+        if '@' in term:
+            return queryset.filter(email__in={term, term.lower()}), False
+        return queryset.filter(email__gte=term, email__lt=term + '\uffff'), False
+
+    def get_queryset(self, request):
+        queryset = super().get_queryset(request)
+        cursor = getattr(request, 'contact_cursor', None)
+        if cursor:
+            queryset = queryset.filter(pk__lt=cursor)
+        return queryset
+
+    def changelist_view(self, request, extra_context=None):
+        # The cursor is not a field lookup, so keep it away from ChangeList.
+        request.GET = request.GET.copy()
+        cursor = request.GET.pop(CURSOR_PARAM, [''])[-1]
+        request.contact_cursor = int(cursor) if cursor.isdigit() else None
+
+        response = super().changelist_view(request, extra_context)
+        cl = getattr(response, 'context_data', {}).get('cl')
+        if cl is not None:
+            results = cl.result_list
+            response.context_data['first_page_url'] = (
+                cl.get_query_string() if request.contact_cursor else None
+            )
+            response.context_data['next_page_url'] = (
+                cl.get_query_string({CURSOR_PARAM: results[-1].pk})
+                if len(results) == cl.list_per_page else None
+            )
+        return response
+
+    def _export(self, request, queryset, fmt):
+        compress = exports.accepts_gzip(request.headers.get('Accept-Encoding', ''))
+        response = StreamingHttpResponse(
+            exports.stream(queryset.order_by('pk'), fmt=fmt, compress=compress),
+            content_type=exports.CONTENT_TYPES[fmt],
+        )
+        response['Content-Disposition'] = 'attachment; filename="contacts.%s"' % fmt
+        if compress:
+            response['Content-Encoding'] = 'gzip'
+        patch_vary_headers(response, ('Accept-Encoding',))
+        return response
+
+    @admin.action(description='Export selected messages as CSV')
+    def export_csv(self, request, queryset):
+        return self._export(request, queryset, 'csv')
+
+    @admin.action(description='Export selected messages as JSON Lines')
+    def export_jsonl(self, request, queryset):
+        return self._export(request, queryset, 'jsonl')
@@ -1,6 +1,12 @@
 from django.apps import AppConfig
+from django.db.backends.signals import connection_created
 
 
 class BaseConfig(AppConfig):
     default_auto_field = "django.db.models.BigAutoField"
     name = "Base"
+
+    def ready(self):
+        from Base.sqlite import apply_pragmas
+
+        connection_created.connect(apply_pragmas, dispatch_uid="Base.sqlite.apply_pragmas")
@@ -0,0 +1,132 @@
+"""
+Streaming export of contact submissions as CSV or JSON Lines.
+
+Rows are read with ``QuerySet.iterator()`` and encoded one chunk at a time, so
+memory use does not grow with the table. Both the ``export_contacts`` command
+and the admin action use these generators.
+"""
+
+import csv
+import io
+import json
+import zlib
+
+from Base.models import contact
+
+FIELDS = ['id', 'created_at', 'name', 'email', 'number', 'content']
+
+# Cells starting with these are evaluated as formulas by spreadsheet apps.
+FORMULA_PREFIXES = ('=', '+', '-', '@', '\t', '\r')
+
+CONTENT_TYPES = {
+    'csv': 'text/csv; charset=utf-8',
+    'jsonl': 'application/x-ndjson; charset=utf-8',
+}
+
+
+def export_queryset(since_id=None, since=None):
+    """Rows to export, oldest first, optionally only those after a cursor."""
+    queryset = contact.objects.order_by('pk')
+    if since_id is not None:
+        queryset = queryset.filter(pk__gt=since_id)
+    if since is not None:
+        queryset = queryset.filter(created_at__gt=since)
+    return queryset
+
+
+def _row(obj):
+    return {
+        'id': obj.pk,
+        'created_at': obj.created_at.isoformat(),
+        'name': obj.name,
+        'email': obj.email,
+        'number': obj.number,
+        'content': obj.content,
+    }
+
+
+def escape_formula(value):
+    """Neutralise a cell an attacker could have turned into a formula."""
+    if isinstance(value, str) and value.startswith(FORMULA_PREFIXES):
+        return "'" + value
+    return value
+
+
+def iter_csv(rows):
+    buffer = io.StringIO()
+    writer = csv.DictWriter(buffer, fieldnames=FIELDS)
+    writer.writeheader()
+    for row in rows:
+        # Every text field comes from the public contact form.
+        writer.writerow({key: escape_formula(value) for key, value in row.items()})
+        # Hand out whatever has been written so far and start a new buffer.
+        yield buffer.getvalue()
+        buffer.seek(0)
+        buffer.truncate()
+    if buffer.getvalue():
+        yield buffer.getvalue()
+
+
+def iter_jsonl(rows):
+    for row in rows:
+        yield json.dumps(row, ensure_ascii=False) + '\n'
+
+
+ENCODERS = {'csv': iter_csv, 'jsonl': iter_jsonl}
+
+
+def accepts_gzip(accept_encoding):
+    """Whether an ``Accept-Encoding`` header allows gzip (honouring ``q=0``)."""
+    for part in accept_encoding.split(','):
+        coding, _, params = part.partition(';')
+        if coding.strip().lower() not in ('gzip', 'x-gzip'):
+            continue
+        quality = 1.0
+        for param in params.split(';'):
+            name, _, value = param.partition('=')
+            if name.strip().lower() == 'q':
+                try:
+                    quality = float(value)
+                except ValueError:
+                    quality = 0.0
+        return quality > 0
+    return False
+
+
+def gzip_stream(chunks, level=6):
+    """Compress an iterable of bytes into a gzip stream on the fly."""
+    compressor = zlib.compressobj(level, zlib.DEFLATED, 31)
+    for chunk in chunks:
+        data = compressor.compress(chunk)
+        if data:
+            yield data
+    yield compressor.flush()
+
+
+def stream(queryset, fmt='csv', compress=False, chunk_size=2000, cursor=None):
+    """
+    Yield the export of ``queryset`` as encoded byte chunks.
+
+    If ``cursor`` is a dict, ``cursor['last_id']`` is kept up to date with the
+    id of the last row streamed, for incremental exports.
+    """
+    def rows():
+        for obj in queryset.iterator(chunk_size=chunk_size):
+            yield _row(obj)
+            if cursor is not None:
+                cursor['last_id'] = obj.pk
+
+    def encoded():
+        # Join small text chunks into larger byte blocks before they are
+        # written or compressed.
+        pending, size = [], 0
+        for text in ENCODERS[fmt](rows()):
+            pending.append(text)
+            size += len(text)
+            if size >= 64 * 1024:
+                yield ''.join(pending).encode('utf-8')
+                pending, size = [], 0
+        if pending:
+            yield ''.join(pending).encode('utf-8')
+
+    return gzip_stream(encoded()) if compress else encoded()
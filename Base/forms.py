@@ -0,0 +1,29 @@
+from django import forms
+
+from Base.models import contact
+
+# Exclusive (min, max) length bounds and the message shown when they are not met.
+LIMITS = {
+    'name': (1, 30, 'Name should be between 1 and 30 characters'),
+    'email': (1, 30, 'Invalid email try again'),
+    'content': (2, 400, 'Content should be between 2 and 400 characters'),
+    'number': (1, 13, 'Invalid number'),
+}
+
+
+class ContactForm(forms.ModelForm):
+    class Meta:
+        model = contact
+        fields = ['name', 'email', 'content', 'number']
+        error_messages = {
+            field: {'required': message, 'max_length': message, 'invalid': message}
+            for field, (low, high, message) in LIMITS.items()
+        }
+
+    def clean(self):
+        cleaned_data = super().clean()
+        for field, (low, high, message) in LIMITS.items():
+            value = cleaned_data.get(field)
+            if value is not None and not low < len(value) < high:
+                self.add_error(field, message)
+        return cleaned_data
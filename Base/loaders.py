@@ -0,0 +1,37 @@
+"""
+Template loader that minifies HTML template source before it is compiled.
+
+Use it inside ``django.template.loaders.cached.Loader`` so the work happens
+once per process, and only for the project's own templates: collapsing
+whitespace inside e.g. ``{% blocktranslate %}`` would change its msgid.
+"""
+
+import re
+
+from django.template.loaders import filesystem
+
+# Content of these blocks is whitespace-sensitive and is left untouched.
+PRESERVE_RE = re.compile(
+    r'(<(pre|textarea|script|style)\b.*?</\2\s*>|{%\s*verbatim\s*%}.*?{%\s*endverbatim\s*%})',
+    re.IGNORECASE | re.DOTALL,
+)
+COMMENT_RE = re.compile(r'<!--(?!\[if).*?-->', re.DOTALL)
+WHITESPACE_RE = re.compile(r'\s+')
+
+
+def minify_html(source):
+    """Strip HTML comments and collapse whitespace runs to a single space."""
+    parts = PRESERVE_RE.split(source)
+    output = []
+    # re.split() yields [text, block, tag name, text, block, tag name, ...].
+    for index in range(0, len(parts), 3):
+        text = COMMENT_RE.sub('', parts[index])
+        output.append(WHITESPACE_RE.sub(' ', text))
+        if index + 1 < len(parts):
+            output.append(parts[index + 1])
+    return ''.join(output).strip()
+
+
+class Loader(filesystem.Loader):
+    def get_contents(self, origin):
+        return minify_html(super().get_contents(origin))
@@ -0,0 +1,326 @@
+"""
+In-process load test for the portfolio page.
+
+Drives ``portfolio.wsgi.application`` directly (no HTTP server) with
+concurrent GET / and POST /contact/ traffic from several threads in one or more
+forked processes, against a temporary copy of the SQLite database. Reports throughput,
+p50/p95/p99 latency and queries per request, and can save the results as a
+JSON baseline or fail when a run regresses against one.
+
+``--startup`` instead measures worker start-up: the time from fork to the first
+response of a worker that is cold (it imports and sets up Django itself),
+preloaded (forked from a process that imported ``portfolio.wsgi``, as gunicorn's
+master does with ``preload_app``) or warm (preloaded with the warm-up run).
+"""
+
+import copy
+import json
+import math
+import multiprocessing
+import os
+import random
+import re
+import shutil
+import statistics
+import subprocess
+import sys
+import tempfile
+import threading
+import time
+from urllib.parse import urlencode
+
+from django.conf import settings
+from django.core.management.base import BaseCommand, CommandError
+from django.db import DEFAULT_DB_ALIAS, connections
+from django.db.utils import load_backend
+from django.urls import reverse
+
+from Base.wsgi_client import Client
+
+CSRF_RE = re.compile(rb'name="csrfmiddlewaretoken" value="([^"]+)"')
+
+# Run in a fresh interpreter per sample: argv is the mode and the path to GET.
+# Base.wsgi_client imports nothing from Django, so a cold worker pays for all of it.
+STARTUP_SCRIPT = """
+import json, os, sys, time
+from Base.wsgi_client import Client
+
+mode, path = sys.argv[1:3]
+start = time.perf_counter()
+if mode != 'cold':
+    import portfolio.wsgi
+preload = time.perf_counter() - start
+
+read_fd, write_fd = os.pipe()
+forked = time.perf_counter()
+pid = os.fork()
+if pid == 0:
+    from portfolio.wsgi import application
+    status, _ = Client(application, '127.0.0.1').request('GET', path=path)
+    os.write(write_fd, json.dumps([status, time.perf_counter() - forked]).encode())
+    os._exit(0)
+os.waitpid(pid, 0)
+status, first_response = json.loads(os.read(read_fd, 4096))
+print(json.dumps({'status': status, 'preload': preload, 'first_response': first_response}))
+"""
+
+
+def percentile(values, pct):
+    """Nearest-rank percentile of ``values`` (which must be sorted)."""
+    if not values:
+        return 0.0
+    rank = max(math.ceil(pct / 100 * len(values)) - 1, 0)
+    return values[rank]
+
+
+def summarize(samples, elapsed):
+    """Aggregate ``(kind, seconds, queries, status)`` samples per request kind."""
+    results = {}
+    for kind in sorted({sample[0] for sample in samples}):
+        rows = [sample for sample in samples if sample[0] == kind]
+        latencies = sorted(sample[1] for sample in rows)
+        errors = sum(1 for sample in rows if sample[3] >= 400)
+        results[kind] = {
+            'requests': len(rows),
+            'errors': errors,
+            'error_rate': errors / len(rows),
+            'rps': len(rows) / elapsed if elapsed else 0.0,
+            'p50_ms': percentile(latencies, 50) * 1000,
+            'p95_ms': percentile(latencies, 95) * 1000,
+            'p99_ms': percentile(latencies, 99) * 1000,
+            'queries_per_request': sum(sample[2] for sample in rows) / len(rows),
+        }
+    results['total'] = {
+        'requests': len(samples),
+        'rps': len(samples) / elapsed if elapsed else 0.0,
+    }
+    return results
+
+
+def compare(baseline, current, threshold):
+    """Return a description of every metric that regressed beyond ``threshold``."""
+    regressions = []
+    for kind, old in baseline.items():
+        new = current.get(kind)
+        if new is None:
+            continue
+        # Failing requests are usually fast, so check them before latency.
+        if new.get('error_rate', 0) > old.get('error_rate', 0):
+            regressions.append('%s error rate %.1f%% -> %.1f%%' % (
+                kind, old.get('error_rate', 0) * 100, new['error_rate'] * 100))
+        if new['rps'] < old['rps'] * (1 - threshold):
+            regressions.append('%s throughput %.1f -> %.1f req/s' % (kind, old['rps'], new['rps']))
+        for key in ('p50_ms', 'p95_ms', 'p99_ms'):
+            if key in old and new[key] > old[key] * (1 + threshold):
+                regressions.append('%s %s %.2f -> %.2f' % (kind, key, old[key], new[key]))
+        if 'queries_per_request' in old and (
+            new['queries_per_request'] > old['queries_per_request'] * (1 + threshold)
+        ):
+            regressions.append('%s queries/request %.2f -> %.2f' % (
+                kind, old['queries_per_request'], new['queries_per_request']))
+    return regressions
+
+
+def run_thread(application, process_index, thread_index, options, db_settings, samples,
+               failures):
+    # Point this thread's default connection at the database copy. Connections
+    # are thread-local, so nothing outside the benchmark threads is affected.
+    connection = load_backend(db_settings['ENGINE']).DatabaseWrapper(
+        db_settings, DEFAULT_DB_ALIAS)
+    connections[DEFAULT_DB_ALIAS] = connection
+    queries = [0]
+
+    def count(execute, sql, params, many, context):
+        queries[0] += 1
+        return execute(sql, params, many, context)
+
+    client = Client(application, '10.%d.%d.1' % (process_index, thread_index))
+    # A prerendered / is static and rejects POSTs; the form posts here.
+    contact_path = reverse('contact')
+    rng = random.Random(process_index * 1000 + thread_index)
+    try:
+        with connection.execute_wrapper(count):
+            # Warm-up request; it also provides the CSRF cookie and token.
+            status, content = client.request('GET')
+            match = CSRF_RE.search(content)
+            token = match.group(1).decode() if match else ''
+            for index in range(options['requests']):
+                if rng.random() < options['post_ratio']:
+                    kind, path = 'POST', contact_path
+                    body = urlencode({
+                        'csrfmiddlewaretoken': token,
+                        'name': 'Bench %d' % index,
+                        'email': 'b%d.%d.%d@ex.com' % (process_index, thread_index, index),
+                        'content': 'Benchmark message %d' % index,
+                        'number': '5550%04d' % (index % 10000),
+                    }).encode()
+                    # Spread POSTs over addresses so the throttle does not reject them.
+                    client.remote_addr = '10.%d.%d.%d' % (
+                        process_index, thread_index, index % 250 + 2)
+                else:
+                    kind, path, body = 'GET', '/', b''
+                before = queries[0]
+                start = time.perf_counter()
+                status, content = client.request(kind, body, path=path)
+                samples.append((kind, time.perf_counter() - start, queries[0] - before, status))
+    except Exception as exc:
+        failures.append('thread %d.%d: %r' % (process_index, thread_index, exc))
+    finally:
+        connection.close()
+        del connections[DEFAULT_DB_ALIAS]
+
+
+def run_process(process_index, options, db_settings):
+    from portfolio.wsgi import application
+
+    samples, failures = [], []
+    threads = [
+        threading.Thread(
+            target=run_thread,
+            args=(application, process_index, index, options, db_settings, samples, failures),
+        )
+        for index in range(options['threads'])
+    ]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    return samples, failures
+
+
+class Command(BaseCommand):
+    help = 'Load-test GET / and POST /contact/ in-process and report latency and throughput.'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--requests', type=int, default=200,
+                            help='Requests per thread (default: 200).')
+        parser.add_argument('--threads', type=int, default=4,
+                            help='Threads per process (default: 4).')
+        parser.add_argument('--processes', type=int, default=1,
+                            help='Forked processes (default: 1, i.e. run in this process).')
+        parser.add_argument('--post-ratio', type=float, default=0.1,
+                            help='Fraction of requests that are POSTs (default: 0.1).')
+        parser.add_argument('--database', default=None,
+                            help='SQLite file to copy (default: the configured database).')
+        parser.add_argument('--save-baseline', metavar='PATH',
+                            help='Write the results to PATH as JSON.')
+        parser.add_argument('--baseline', metavar='PATH',
+                            help='Compare against the JSON baseline at PATH.')
+        parser.add_argument('--threshold', type=float, default=0.10,
+                            help='Allowed relative regression (default: 0.10).')
+        parser.add_argument('--max-error-rate', type=float, default=0.0,
+                            help='Fail when more than this fraction of requests get a '
+                                 'status >= 400 (default: 0).')
+        parser.add_argument('--startup', action='store_true',
+                            help='Measure cold, preloaded and warmed-up worker start-up instead.')
+        parser.add_argument('--startup-runs', type=int, default=5,
+                            help='Start-up samples per mode (default: 5).')
+        parser.add_argument('--path', default='/',
+                            help='Path requested by the start-up benchmark (default: /).')
+
+    def handle(self, *args, **options):
+        db_settings = copy.deepcopy(connections.settings[DEFAULT_DB_ALIAS])
+        if db_settings['ENGINE'] != 'django.db.backends.sqlite3':
+            raise CommandError('bench only runs against a SQLite database.')
+        if settings.CONTACT_QUEUE_ENABLED and not options['startup']:
+            # The queue's flusher thread would write to the real database.
+            raise CommandError('bench cannot run with CONTACT_QUEUE_ENABLED.')
+        source = options['database'] or db_settings['NAME']
+
+        with tempfile.TemporaryDirectory() as tmpdir:
+            db_settings['NAME'] = os.path.join(tmpdir, 'bench.sqlite3')
+            shutil.copyfile(source, db_settings['NAME'])
+            if options['startup']:
+                self.startup(options, db_settings['NAME'])
+                return
+            elapsed, samples = self.run(options, db_settings)
+
+        results = summarize(samples, elapsed)
+        self.report(results)
+        errors = sum(row['errors'] for kind, row in results.items() if kind != 'total')
+        if samples and errors / len(samples) > options['max_error_rate']:
+            # A failing run is fast and must neither become a baseline nor pass a gate.
+            raise CommandError('%d of %d requests failed with status >= 400.' % (
+                errors, len(samples)))
+        report = {
+            'config': {key: options[key] for key in
+                       ('requests', 'threads', 'processes', 'post_ratio')},
+            'results': results,
+        }
+        if options['save_baseline']:
+            with open(options['save_baseline'], 'w') as fh:
+                json.dump(report, fh, indent=2, sort_keys=True)
+            self.stdout.write('Baseline written to %s' % options['save_baseline'])
+        if options['baseline']:
+            with open(options['baseline']) as fh:
+                baseline = json.load(fh)
+            regressions = compare(baseline['results'], results, options['threshold'])
+            if regressions:
+                raise CommandError('Regressions against %s:\n  %s' % (
+                    options['baseline'], '\n  '.join(regressions)))
+            self.stdout.write(self.style.SUCCESS('No regressions against %s' % options['baseline']))
+
+    def run(self, options, db_settings):
+        start = time.perf_counter()
+        if options['processes'] <= 1:
+            samples, failures = run_process(0, options, db_settings)
+        else:
+            # No connection may be shared across fork.
+            connections.close_all()
+            context = multiprocessing.get_context('fork')
+            with context.Pool(options['processes']) as pool:
+                parts = pool.starmap(run_process, [
+                    (index, options, db_settings) for index in range(options['processes'])
+                ])
+            samples = [sample for part, _ in parts for sample in part]
+            failures = [failure for _, part in parts for failure in part]
+        if failures:
+            raise CommandError('Benchmark threads failed:\n  ' + '\n  '.join(failures))
+        return time.perf_counter() - start, samples
+
+    def startup(self, options, database):
+        results = {}
+        for mode in ('cold', 'preload', 'warm'):
+            env = dict(
+                os.environ,
+                DATABASE_URL='sqlite:///' + database,
+                WARMUP_ENABLED=str(mode == 'warm'),
+            )
+            runs = []
+            for _ in range(options['startup_runs']):
+                process = subprocess.run(
+                    [sys.executable, '-c', STARTUP_SCRIPT, mode, options['path']],
+                    cwd=settings.BASE_DIR, env=env, capture_output=True, text=True,
+                )
+                if process.returncode:
+                    raise CommandError('Start-up run failed:\n' + process.stderr)
+                run = json.loads(process.stdout.splitlines()[-1])
+                if run['status'] >= 400:
+                    raise CommandError('GET %s returned %d during start-up run.' % (
+                        options['path'], run['status']))
+                runs.append(run)
+            results[mode] = {
+                'preload_ms': statistics.median(run['preload'] for run in runs) * 1000,
+                'first_response_ms': statistics.median(
+                    run['first_response'] for run in runs) * 1000,
+            }
+
+        self.stdout.write('%-8s %12s %20s' % ('mode', 'preload ms', 'first response ms'))
+        for mode, row in results.items():
+            self.stdout.write('%-8s %12.1f %20.1f' % (
+                mode, row['preload_ms'], row['first_response_ms']))
+        cold, warm = results['cold']['first_response_ms'], results['warm']['first_response_ms']
+        self.stdout.write('Worker time to first response: %.1fx faster when warmed up' % (
+            cold / warm if warm else float('inf')))
+
+    def report(self, results):
+        self.stdout.write('%-6s %9s %7s %9s %9s %9s %9s %8s' % (
+            'kind', 'requests', 'errors', 'req/s', 'p50 ms', 'p95 ms', 'p99 ms', 'queries'))
+        for kind, row in results.items():
+            if kind == 'total':
+                continue
+            self.stdout.write('%-6s %9d %7d %9.1f %9.2f %9.2f %9.2f %8.2f' % (
+                kind, row['requests'], row['errors'], row['rps'], row['p50_ms'],
+                row['p95_ms'], row['p99_ms'], row['queries_per_request']))
+        total = results['total']
+        self.stdout.write('total  %9d %7s %9.1f' % (total['requests'], '', total['rps']))
@@ -0,0 +1,63 @@
+import os
+import sys
+from pathlib import Path
+
+from django.core.management.base import BaseCommand, CommandError
+from django.utils.dateparse import parse_datetime
+
+from Base import exports
+
+
+class Command(BaseCommand):
+    help = 'Stream contact submissions as CSV or JSON Lines in constant memory.'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--format', choices=sorted(exports.ENCODERS), default='csv')
+        parser.add_argument('--output', '-o', default='-',
+                            help='File to write (default: standard output).')
+        parser.add_argument('--gzip', action='store_true', help='Compress the output.')
+        parser.add_argument('--since-id', type=int,
+                            help='Only export rows with a greater id.')
+        parser.add_argument('--since', help='Only export rows created after this ISO timestamp.')
+        parser.add_argument('--cursor-file',
+                            help='Read --since-id from this file and store the last '
+                                 'exported id in it afterwards, for incremental syncs.')
+        parser.add_argument('--chunk-size', type=int, default=2000,
+                            help='Rows fetched from the database at a time (default: 2000).')
+
+    def handle(self, *args, **options):
+        since_id = options['since_id']
+        cursor_file = Path(options['cursor_file']) if options['cursor_file'] else None
+        if since_id is None and cursor_file is not None and cursor_file.exists():
+            text = cursor_file.read_text().strip()
+            since_id = int(text) if text else None
+
+        since = None
+        if options['since']:
+            since = parse_datetime(options['since'])
+            if since is None:
+                raise CommandError('--since must be an ISO 8601 timestamp.')
+
+        cursor = {'last_id': since_id}
+        chunks = exports.stream(
+            exports.export_queryset(since_id=since_id, since=since),
+            fmt=options['format'],
+            compress=options['gzip'],
+            chunk_size=options['chunk_size'],
+            cursor=cursor,
+        )
+        if options['output'] == '-':
+            out = sys.stdout.buffer
+            for chunk in chunks:
+                out.write(chunk)
+            out.flush()
+        else:
+            with open(options['output'], 'wb') as out:
+                for chunk in chunks:
+                    out.write(chunk)
+
+        # Only advance the cursor once the export has been written completely.
+        if cursor_file is not None and cursor['last_id'] is not None:
+            tmp = cursor_file.with_name(cursor_file.name + '.tmp')
+            tmp.write_text('%d\n' % cursor['last_id'])
+            os.replace(tmp, cursor_file)
@@ -0,0 +1,67 @@
+"""
+Render the portfolio page once to a static ``index.html``.
+
+The output directory (``PRERENDER_ROOT`` by default) also gets ``index.html.gz``
+and, when the ``brotli`` package is installed, ``index.html.br``, so WhiteNoise
+or a reverse proxy can serve the precompressed page without touching Django.
+The page carries no CSRF token; the contact form fetches one from ``/csrf``
+when it is submitted and posts to ``/contact/``.
+"""
+
+import gzip
+import os
+from pathlib import Path
+
+from django.conf import settings
+from django.contrib.auth.models import AnonymousUser
+from django.core.management.base import BaseCommand
+from django.http import HttpRequest
+from django.template.loader import render_to_string
+
+try:
+    import brotli
+except ImportError:
+    brotli = None
+
+
+def render_page(template_name='home.html'):
+    request = HttpRequest()
+    request.method = 'GET'
+    request.path = request.path_info = '/'
+    request.user = AnonymousUser()
+    return render_to_string(template_name, {'prerender': True}, request=request).encode('utf-8')
+
+
+def write_atomic(path, content):
+    tmp = path.with_name(path.name + '.tmp')
+    tmp.write_bytes(content)
+    os.replace(tmp, path)
+
+
+class Command(BaseCommand):
+    help = 'Write the rendered page and its gzip/Brotli siblings for static serving.'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--output', '-o', default=None,
+                            help='Directory to write to (default: PRERENDER_ROOT).')
+
+    def handle(self, *args, **options):
+        root = Path(options['output'] or settings.PRERENDER_ROOT)
+        root.mkdir(parents=True, exist_ok=True)
+        page = render_page()
+
+        outputs = {
+            'index.html': page,
+            # mtime=0 keeps the file byte-identical between deploys.
+            'index.html.gz': gzip.compress(page, compresslevel=9, mtime=0),
+        }
+        if brotli is not None:
+            outputs['index.html.br'] = brotli.compress(page, mode=brotli.MODE_TEXT, quality=11)
+        else:
+            self.stderr.write('brotli is not installed; skipping index.html.br')
+            # Do not leave a stale Brotli copy next to the new page.
+            (root / 'index.html.br').unlink(missing_ok=True)
+
+        for name, content in outputs.items():
+            write_atomic(root / name, content)
+            self.stdout.write('%s (%d bytes)' % (root / name, len(content)))
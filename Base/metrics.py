@@ -0,0 +1,195 @@
+"""
+Per-request timing, ``Server-Timing`` headers and Prometheus metrics.
+
+``ServerTimingMiddleware`` splits each request into phases (middleware and URL
+resolution, view, template rendering, database) and reports them in a
+``Server-Timing`` header. A sample per request is appended to a bounded ring
+buffer; ``deque.append`` is atomic, so request threads never take a lock. The
+``metrics`` view drains the buffer into cumulative histograms when scraped.
+
+All state is per process: each gunicorn worker reports its own requests, and
+a scrape of the load-balanced ``/metrics`` URL reaches one arbitrary worker.
+Every series therefore carries a ``pid`` label, so a worker's counters never
+appear to reset when another worker answers; sum over ``pid`` (e.g.
+``sum without (pid) (rate(...))``) to get totals for the site.
+"""
+
+import itertools
+import os
+import threading
+import time
+from collections import deque
+from contextlib import ExitStack, contextmanager
+from contextvars import ContextVar
+
+from django.conf import settings
+from django.db import connections
+from whitenoise.middleware import WhiteNoiseFileResponse
+
+BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0)
+
+_current = ContextVar('request_timings', default=None)
+_sequence = itertools.count(1)
+_samples = deque(maxlen=settings.METRICS_RING_SIZE)
+
+
+class RequestTimings:
+    def __init__(self):
+        self.start = time.perf_counter()
+        self.resolved = None
+        self.template = 0.0
+        self.db = 0.0
+        self.queries = 0
+
+    def db_wrapper(self, execute, sql, params, many, context):
+        start = time.perf_counter()
+        try:
+            return execute(sql, params, many, context)
+        finally:
+            self.db += time.perf_counter() - start
+            self.queries += 1
+
+
+@contextmanager
+def template_timer():
+    """Attribute the enclosed block to the current request's template phase."""
+    timings = _current.get()
+    start = time.perf_counter()
+    try:
+        yield
+    finally:
+        if timings is not None:
+            timings.template += time.perf_counter() - start
+
+
+def _view_label(request, response):
+    if isinstance(response, WhiteNoiseFileResponse):
+        # Static files and the prerendered page never reach a view.
+        return 'static'
+    match = getattr(request, 'resolver_match', None)
+    if match is None:
+        return 'unresolved'
+    return match.view_name
+
+
+class ServerTimingMiddleware:
+    def __init__(self, get_response):
+        self.get_response = get_response
+
+    def __call__(self, request):
+        timings = RequestTimings()
+        token = _current.set(timings)
+        try:
+            with ExitStack() as stack:
+                for connection in connections.all():
+                    stack.enter_context(connection.execute_wrapper(timings.db_wrapper))
+                response = self.get_response(request)
+        finally:
+            _current.reset(token)
+
+        end = time.perf_counter()
+        total = end - timings.start
+        resolved = timings.resolved or end
+        pre = resolved - timings.start
+        # The view phase excludes the template and database time spent inside it.
+        view = max(end - resolved - timings.template - timings.db, 0.0)
+        response['Server-Timing'] = ', '.join([
+            'pre;dur=%.2f;desc="middleware+urls"' % (pre * 1000),
+            'view;dur=%.2f' % (view * 1000),
+            'tmpl;dur=%.2f' % (timings.template * 1000),
+            'db;dur=%.2f;desc="%d queries"' % (timings.db * 1000, timings.queries),
+            'total;dur=%.2f' % (total * 1000),
+        ])
+        _samples.append((next(_sequence), _view_label(request, response), total, timings.queries))
+        return response
+
+    def process_view(self, request, view_func, view_args, view_kwargs):
+        timings = _current.get()
+        if timings is not None:
+            timings.resolved = time.perf_counter()
+
+
+class Histogram:
+    def __init__(self):
+        self.buckets = [0] * len(BUCKETS)
+        self.count = 0
+        self.sum = 0.0
+        self.queries = 0
+
+    def observe(self, seconds, queries):
+        for index, bound in enumerate(BUCKETS):
+            if seconds <= bound:
+                self.buckets[index] += 1
+        self.count += 1
+        self.sum += seconds
+        self.queries += queries
+
+
+class Registry:
+    """Cumulative histograms per view, fed from the ring buffer on scrape."""
+
+    def __init__(self):
+        self.lock = threading.Lock()
+        self.views = {}
+        self.last_sequence = 0
+        self.dropped = 0
+
+    def drain(self, samples):
+        with self.lock:
+            while True:
+                try:
+                    sequence, view, seconds, queries = samples.popleft()
+                except IndexError:
+                    break
+                # The ring buffer discards its oldest samples when it overflows.
+                self.dropped += max(sequence - self.last_sequence - 1, 0)
+                self.last_sequence = max(sequence, self.last_sequence)
+                self.views.setdefault(view, Histogram()).observe(seconds, queries)
+
+    def render(self):
+        pid = os.getpid()
+        with self.lock:
+            lines = [
+                '# HELP portfolio_request_duration_seconds Request latency by view.',
+                '# TYPE portfolio_request_duration_seconds histogram',
+            ]
+            for view, histogram in sorted(self.views.items()):
+                for bound, count in zip(BUCKETS, histogram.buckets):
+                    lines.append(
+                        'portfolio_request_duration_seconds_bucket{pid="%d",view="%s",le="%s"} %d'
+                        % (pid, view, bound, count)
+                    )
+                lines.append(
+                    'portfolio_request_duration_seconds_bucket{pid="%d",view="%s",le="+Inf"} %d'
+                    % (pid, view, histogram.count)
+                )
+                lines.append(
+                    'portfolio_request_duration_seconds_sum{pid="%d",view="%s"} %.6f'
+                    % (pid, view, histogram.sum)
+                )
+                lines.append(
+                    'portfolio_request_duration_seconds_count{pid="%d",view="%s"} %d'
+                    % (pid, view, histogram.count)
+                )
+            lines += [
+                '# HELP portfolio_db_queries_total Database queries by view.',
+                '# TYPE portfolio_db_queries_total counter',
+            ]
+            for view, histogram in sorted(self.views.items()):
+                lines.append('portfolio_db_queries_total{pid="%d",view="%s"} %d'
+                             % (pid, view, histogram.queries))
+            lines += [
+                '# HELP portfolio_metrics_dropped_total Samples lost to ring buffer overflow.',
+                '# TYPE portfolio_metrics_dropped_total counter',
+                'portfolio_metrics_dropped_total{pid="%d"} %d' % (pid, self.dropped),
+            ]
+            return '\n'.join(lines) + '\n'
+
+
+registry = Registry()
+
+
+def render_metrics():
+    """Return all metrics of this process in Prometheus text format."""
+    registry.drain(_samples)
+    return registry.render()
@@ -0,0 +1,24 @@
+# Generated by Django 5.1.15 on 2026-10-17 07:07
+
+import django.utils.timezone
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("Base", "0001_initial"),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name="contact",
+            name="created_at",
+            field=models.DateTimeField(db_index=True, default=django.utils.timezone.now),
+        ),
+        migrations.AlterField(
+            model_name="contact",
+            name="email",
+            field=models.EmailField(db_index=True, max_length=40),
+        ),
+    ]
@@ -1,8 +1,10 @@
 from django.db import models
+from django.utils import timezone
 
 # Create your models here.
 class contact(models.Model):
     name = models.CharField(max_length=40)
-    email = models.EmailField(max_length=40)
+    email = models.EmailField(max_length=40, db_index=True)
     content = models.TextField(max_length=400)
-    number = models.CharField(max_length=13)
\ No newline at end of file
+    number = models.CharField(max_length=13)
+    created_at = models.DateTimeField(default=timezone.now, db_index=True)
\ No newline at end of file
@@ -0,0 +1,120 @@
+"""
+In-memory full-page cache for the portfolio page.
+
+The rendered page is stored in the configured Django cache, keyed by the
+template's mtime and the staticfiles manifest hash, so a deploy or a template
+edit invalidates it without any explicit purge. The CSRF token is the only
+per-visitor part of the page: it is rendered as a placeholder and swapped in on
+every hit.
+"""
+
+import hashlib
+import os
+
+from django.conf import settings
+from django.contrib.staticfiles.storage import staticfiles_storage
+from django.core.cache import caches
+from django.http import HttpResponse
+from django.middleware.csrf import get_token
+from django.shortcuts import render
+from django.template.loader import get_template, render_to_string
+from django.utils.cache import get_conditional_response, patch_cache_control, patch_vary_headers
+from django.utils.http import http_date
+
+from Base import metrics
+
+CSRF_PLACEHOLDER = "__page_cache_csrf_token__"
+
+_template_paths = {}
+
+
+def _template_path(template_name):
+    path = _template_paths.get(template_name)
+    if path is None:
+        path = _template_paths[template_name] = get_template(template_name).origin.name
+    return path
+
+
+def _manifest_state():
+    """Return ``(hash, mtime)`` of the staticfiles manifest, if there is one."""
+    manifest_hash = getattr(staticfiles_storage, "manifest_hash", "") or ""
+    manifest_name = getattr(staticfiles_storage, "manifest_name", None)
+    mtime = 0
+    if manifest_name:
+        try:
+            mtime = int(os.stat(staticfiles_storage.path(manifest_name)).st_mtime)
+        except (OSError, NotImplementedError):
+            pass
+    return manifest_hash, mtime
+
+
+def has_pending_messages(request):
+    storage = getattr(request, "_messages", None)
+    return storage is not None and len(storage) > 0
+
+
+def is_cacheable(request):
+    return (
+        settings.PAGE_CACHE_ENABLED
+        and request.method in ("GET", "HEAD")
+        and not has_pending_messages(request)
+    )
+
+
+def _get_entry(request, template_name):
+    template_mtime = int(os.stat(_template_path(template_name)).st_mtime)
+    manifest_hash, manifest_mtime = _manifest_state()
+    key = "page:%s:%d:%s" % (template_name, template_mtime, manifest_hash)
+
+    cache = caches[settings.PAGE_CACHE_ALIAS]
+    entry = cache.get(key)
+    if entry is None:
+        with metrics.template_timer():
+            content = render_to_string(
+                template_name, {"csrf_token": CSRF_PLACEHOLDER}, request=request
+            ).encode(settings.DEFAULT_CHARSET)
+        entry = {
+            "content": content,
+            "digest": hashlib.sha256(content).hexdigest(),
+            "last_modified": max(template_mtime, manifest_mtime),
+        }
+        cache.set(key, entry, settings.PAGE_CACHE_TIMEOUT)
+    return entry
+
+
+def render_cached(request, template_name):
+    """
+    Render ``template_name`` for ``request``, serving it from the page cache
+    when nothing request-specific (flash messages, non-GET method) is involved.
+
+    Answers conditional requests with 304 Not Modified.
+    """
+    if not is_cacheable(request):
+        with metrics.template_timer():
+            return render(request, template_name)
+
+    entry = _get_entry(request, template_name)
+    token = get_token(request)
+    # The embedded token is only valid for the visitor's CSRF cookie, so the
+    # validator has to change whenever that cookie does.
+    secret = request.META["CSRF_COOKIE"]
+    etag = '"%s"' % hashlib.sha256(
+        (entry["digest"] + secret).encode()
+    ).hexdigest()[:32]
+
+    response = HttpResponse()
+    response["ETag"] = etag
+    response["Last-Modified"] = http_date(entry["last_modified"])
+    patch_cache_control(response, private=True, no_cache=True)
+    patch_vary_headers(response, ("Cookie",))
+
+    # Validate on the ETag only: If-Modified-Since knows nothing about the
+    # CSRF cookie, so a 304 for it could leave a stale token on the page.
+    conditional = get_conditional_response(request, etag=etag, response=response)
+    if conditional is not response:
+        return conditional
+
+    response.content = entry["content"].replace(
+        CSRF_PLACEHOLDER.encode(), token.encode()
+    )
+    return response
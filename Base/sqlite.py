@@ -0,0 +1,15 @@
+"""
+Per-connection tuning for the SQLite backend.
+"""
+
+from django.conf import settings
+
+
+def apply_pragmas(sender, connection, **kwargs):
+    """``connection_created`` receiver applying ``SQLITE_PRAGMAS``."""
+    if connection.vendor != 'sqlite':
+        return
+    # Run on the raw DB-API connection so the pragmas are not counted as
+    # queries by execute wrappers or debug tooling.
+    for name, value in settings.SQLITE_PRAGMAS.items():
+        connection.connection.execute('PRAGMA %s = %s' % (name, value))
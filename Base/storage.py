@@ -0,0 +1,95 @@
+"""
+Static files storage that also builds responsive image variants.
+
+During ``collectstatic`` every raster image under ``images/`` is resized to
+``RESPONSIVE_IMAGE_WIDTHS`` and re-encoded in each of
+``RESPONSIVE_IMAGE_FORMATS`` that the installed Pillow can write. The variants
+are hashed and compressed like any other static file, and a sidecar index
+(``RESPONSIVE_IMAGE_INDEX``) records their intrinsic sizes for the ``picture``
+template tag.
+"""
+
+import json
+import os
+from io import BytesIO
+
+from django.conf import settings
+from django.core.files.base import ContentFile
+from PIL import Image
+from whitenoise.storage import CompressedManifestStaticFilesStorage
+
+SOURCE_EXTENSIONS = ('.png', '.jpg', '.jpeg')
+
+SAVE_OPTIONS = {
+    'avif': {'quality': 55},
+    'webp': {'quality': 80},
+}
+
+
+def supported_formats():
+    Image.init()
+    return [fmt for fmt in settings.RESPONSIVE_IMAGE_FORMATS if fmt.upper() in Image.SAVE]
+
+
+def variant_name(name, width, fmt):
+    root, _ = os.path.splitext(name)
+    return f'{root}-{width}w.{fmt}'
+
+
+def is_source_image(name):
+    return (
+        name.startswith(settings.RESPONSIVE_IMAGE_PREFIX)
+        and name.lower().endswith(SOURCE_EXTENSIONS)
+    )
+
+
+class ResponsiveStaticFilesStorage(CompressedManifestStaticFilesStorage):
+    def post_process(self, paths, dry_run=False, **options):
+        if not dry_run:
+            paths = dict(paths)
+            index = {}
+            for name in [name for name in paths if is_source_image(name)]:
+                storage, path = paths[name]
+                index[name] = self.build_variants(name, storage, path, paths)
+            # Overwrite the index of a previous run instead of saving a copy
+            # under a new name that the template tag would never read.
+            if self.exists(settings.RESPONSIVE_IMAGE_INDEX):
+                self.delete(settings.RESPONSIVE_IMAGE_INDEX)
+            self._save(
+                settings.RESPONSIVE_IMAGE_INDEX,
+                ContentFile(json.dumps(index, indent=2, sort_keys=True).encode()),
+            )
+        yield from super().post_process(paths, dry_run=dry_run, **options)
+
+    def build_variants(self, name, storage, path, paths):
+        """
+        Write the variants of one source image and add them to ``paths`` so
+        that they are hashed into the manifest. Return its index entry.
+        """
+        with storage.open(path) as source:
+            image = Image.open(source)
+            image.load()
+        width, height = image.size
+        widths = sorted({w for w in settings.RESPONSIVE_IMAGE_WIDTHS if w < width} | {width})
+        variants = []
+        for fmt in supported_formats():
+            for target in widths:
+                resized = image
+                if target != width:
+                    resized = image.resize(
+                        (target, round(height * target / width)), Image.Resampling.LANCZOS
+                    )
+                buffer = BytesIO()
+                resized.save(buffer, fmt.upper(), **SAVE_OPTIONS.get(fmt, {}))
+                output = variant_name(name, target, fmt)
+                if self.exists(output):
+                    self.delete(output)
+                self._save(output, ContentFile(buffer.getvalue()))
+                paths[output] = (self, output)
+                variants.append({
+                    'name': output,
+                    'format': fmt,
+                    'width': resized.width,
+                    'height': resized.height,
+                })
+        return {'width': width, 'height': height, 'variants': variants}
@@ -0,0 +1,241 @@
+"""
+Buffered write pipeline for contact form submissions.
+
+Accepted submissions are appended to a per-process spool file and kept in
+memory until a batch is written with ``bulk_create``. A batch is written when
+it reaches ``CONTACT_QUEUE_BATCH_SIZE`` rows, every
+``CONTACT_QUEUE_FLUSH_INTERVAL`` seconds, and when the process exits. The spool
+file always holds every row not yet committed, so a restarted worker picks up
+whatever a previous process left behind. Delivery is at-least-once: a process
+killed between the commit and the spool rewrite replays that batch.
+
+A spool is recovered by renaming it to ``<spool>.recovering-<pid>`` first. A
+claimed file whose rows cannot be written stays in place and is retried later,
+by the claiming process or, once that has exited, by any other.
+"""
+
+import atexit
+import json
+import logging
+import os
+import threading
+from pathlib import Path
+
+from django.conf import settings
+from django.db import connections
+from django.utils import timezone
+
+from Base.models import contact
+
+logger = logging.getLogger(__name__)
+
+SPOOL_PREFIX = 'contact-'
+SPOOL_SUFFIX = '.jsonl'
+CLAIM_MARKER = '.recovering-'
+
+
+def _pid_alive(pid):
+    try:
+        os.kill(pid, 0)
+    except ProcessLookupError:
+        return False
+    except PermissionError:
+        return True
+    return True
+
+
+class SubmissionQueue:
+    def __init__(self, spool_dir, batch_size=50, flush_interval=2.0):
+        self.spool_dir = Path(spool_dir)
+        self.batch_size = batch_size
+        self.flush_interval = flush_interval
+        self._pid = None
+        self._needs_recovery = False
+
+    def _start(self):
+        """(Re)initialise per-process state; called lazily so it survives fork."""
+        pid = os.getpid()
+        self._lock = threading.Lock()
+        self._flush_lock = threading.Lock()
+        self._wake = threading.Event()
+        self._stop = threading.Event()
+        self._pending = []
+        self.spool_dir.mkdir(parents=True, exist_ok=True)
+        self.spool_path = self.spool_dir / f'{SPOOL_PREFIX}{pid}{SPOOL_SUFFIX}'
+        # A spool under our pid was left by an earlier process (or an earlier
+        # start of this queue); nothing in memory holds its rows, so recover
+        # it like any other before starting a fresh one.
+        self._safe_recover()
+        self._spool = open(self.spool_path, 'a', encoding='utf-8')
+        self._thread = None
+        if self.flush_interval:
+            self._thread = threading.Thread(
+                target=self._run, name='contact-queue-flusher', daemon=True
+            )
+            self._thread.start()
+        atexit.register(self.close)
+        self._pid = pid
+
+    def _ensure_started(self):
+        if self._pid != os.getpid():
+            self._start()
+
+    def put(self, data):
+        """Spool one validated submission (a dict of ``contact`` field values)."""
+        self._ensure_started()
+        # Record when the message was sent, not when its batch is written.
+        data = dict(data)
+        data.setdefault('created_at', timezone.now().isoformat())
+        line = json.dumps(data, ensure_ascii=False) + '\n'
+        with self._lock:
+            self._spool.write(line)
+            self._spool.flush()
+            self._pending.append(data)
+            full = len(self._pending) >= self.batch_size
+        if full:
+            if self._thread is not None:
+                self._wake.set()
+            else:
+                self.flush()
+
+    def __len__(self):
+        if self._pid != os.getpid():
+            return 0
+        with self._lock:
+            return len(self._pending)
+
+    def flush(self):
+        """Write all pending submissions; return the number of rows written."""
+        if self._pid != os.getpid():
+            return 0
+        with self._flush_lock:
+            with self._lock:
+                batch, self._pending = self._pending, []
+            if not batch:
+                return 0
+            try:
+                contact.objects.bulk_create(
+                    [contact(**data) for data in batch], batch_size=self.batch_size
+                )
+            except Exception:
+                logger.exception('Could not write %d contact submissions', len(batch))
+                with self._lock:
+                    self._pending[:0] = batch
+                return 0
+            with self._lock:
+                self._rewrite_spool()
+        if self._needs_recovery:
+            self._safe_recover()
+        return len(batch)
+
+    def _rewrite_spool(self):
+        tmp_path = self.spool_path.with_suffix('.tmp')
+        with open(tmp_path, 'w', encoding='utf-8') as tmp:
+            for data in self._pending:
+                tmp.write(json.dumps(data, ensure_ascii=False) + '\n')
+        self._spool.close()
+        os.replace(tmp_path, self.spool_path)
+        self._spool = open(self.spool_path, 'a', encoding='utf-8')
+
+    def _safe_recover(self):
+        """Run ``recover()`` without ever failing the caller's request."""
+        try:
+            self.recover()
+        except Exception:
+            logger.exception('Could not recover spooled contact submissions')
+            self._needs_recovery = True
+
+    def _claimable(self):
+        """Yield ``(path, name)`` of spools to recover, ``name`` being the original."""
+        pid = os.getpid()
+        for path in self.spool_dir.glob(f'{SPOOL_PREFIX}*{SPOOL_SUFFIX}'):
+            try:
+                owner = int(path.name[len(SPOOL_PREFIX):-len(SPOOL_SUFFIX)])
+            except ValueError:
+                continue
+            # Only the queue's own start-up calls this before opening its spool,
+            # so a spool under our pid is a leftover, not the live one.
+            if (owner == pid and self._pid != pid) or not _pid_alive(owner):
+                yield path, path.name
+        for path in self.spool_dir.glob(f'{SPOOL_PREFIX}*{SPOOL_SUFFIX}{CLAIM_MARKER}*'):
+            name, _, claimer = path.name.rpartition(CLAIM_MARKER)
+            try:
+                claimer = int(claimer)
+            except ValueError:
+                continue
+            if claimer == pid or not _pid_alive(claimer):
+                yield path, name
+
+    def _read_spool(self, path):
+        rows = []
+        with open(path, encoding='utf-8') as spool:
+            for number, line in enumerate(spool, 1):
+                if not line.strip():
+                    continue
+                try:
+                    rows.append(contact(**json.loads(line)))
+                except (ValueError, TypeError):
+                    # Typically the torn last line of a killed process.
+                    logger.warning('Skipping unreadable line %d of %s: %r', number, path, line)
+        return rows
+
+    def recover(self):
+        """Write the rows spooled by processes that are no longer running."""
+        self._needs_recovery = False
+        recovered = 0
+        for path, name in list(self._claimable()):
+            claimed = path.with_name(f'{name}{CLAIM_MARKER}{os.getpid()}')
+            try:
+                os.rename(path, claimed)
+            except FileNotFoundError:
+                continue  # another worker claimed it first
+            rows = self._read_spool(claimed)
+            try:
+                contact.objects.bulk_create(rows, batch_size=self.batch_size)
+            except Exception:
+                # Keep the claimed file; it is retried after the next flush,
+                # or by another process once this one has exited.
+                logger.exception('Could not recover %d rows from %s', len(rows), claimed)
+                self._needs_recovery = True
+                continue
+            os.unlink(claimed)
+            recovered += len(rows)
+        if recovered:
+            logger.info('Recovered %d spooled contact submissions', recovered)
+        return recovered
+
+    def _run(self):
+        while not self._stop.is_set():
+            self._wake.wait(self.flush_interval)
+            self._wake.clear()
+            self.flush()
+            connections.close_all()
+
+    def close(self):
+        """Flush everything and stop the flusher thread (graceful shutdown)."""
+        if self._pid != os.getpid():
+            return
+        self._stop.set()
+        self._wake.set()
+        if self._thread is not None and self._thread is not threading.current_thread():
+            self._thread.join(timeout=5)
+        self.flush()
+        with self._lock:
+            self._spool.close()
+            if not self._pending:
+                self.spool_path.unlink(missing_ok=True)
+        self._pid = None
+
+
+_queue = None
+
+
+def get_queue():
+    global _queue
+    if _queue is None:
+        _queue = SubmissionQueue(
+            settings.CONTACT_QUEUE_SPOOL_DIR,
+            batch_size=settings.CONTACT_QUEUE_BATCH_SIZE,
+            flush_interval=settings.CONTACT_QUEUE_FLUSH_INTERVAL,
+        )
+    return _queue
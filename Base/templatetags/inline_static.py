@@ -0,0 +1,67 @@
+"""
+``{% inline_css %}`` inlines a minified static stylesheet into the page so the
+first paint does not wait for a separate request. The minified text is cached
+per process under the file's manifest-hashed name.
+"""
+
+import os
+import re
+from urllib.parse import urljoin
+
+from django import template
+from django.contrib.staticfiles import finders
+from django.contrib.staticfiles.storage import staticfiles_storage
+from django.utils.safestring import mark_safe
+
+register = template.Library()
+
+COMMENT_RE = re.compile(r'/\*.*?\*/', re.DOTALL)
+WHITESPACE_RE = re.compile(r'\s+')
+PUNCTUATION_RE = re.compile(r'\s*([{};,>])\s*')
+COLON_RE = re.compile(r':\s+')
+URL_RE = re.compile(r'url\(\s*([\'"]?)(?!data:|https?:|//|/|#)([^\'")]+)\1\s*\)')
+
+_cache = {}
+
+
+def minify_css(css):
+    css = COMMENT_RE.sub('', css)
+    css = WHITESPACE_RE.sub(' ', css)
+    css = PUNCTUATION_RE.sub(r'\1', css)
+    css = COLON_RE.sub(':', css)
+    return css.replace(';}', '}').strip()
+
+
+def _source_path(name):
+    """Return the path of the stylesheet as it will be served."""
+    if hasattr(staticfiles_storage, 'stored_name'):
+        try:
+            return staticfiles_storage.path(staticfiles_storage.stored_name(name))
+        except ValueError:
+            pass
+    path = finders.find(name)
+    if path is None:
+        raise template.TemplateSyntaxError(f'Static file {name!r} could not be found')
+    return path
+
+
+def inline_css_text(name):
+    path = _source_path(name)
+    # With the manifest storage the path already carries the content hash.
+    key = (path, os.stat(path).st_mtime)
+    css = _cache.get(key)
+    if css is None:
+        with open(path, encoding='utf-8') as fh:
+            css = minify_css(fh.read())
+        # Relative references must now resolve against the page, not the file.
+        # Resolve them against the URL the file is served from: the manifest
+        # storage has already rewritten them to hashed names in the stored copy.
+        base = staticfiles_storage.url(name)
+        css = URL_RE.sub(lambda m: 'url(%s)' % urljoin(base, m.group(2)), css)
+        _cache[key] = css
+    return css
+
+
+@register.simple_tag
+def inline_css(name):
+    return mark_safe('<style>%s</style>' % inline_css_text(name).replace('</', '<\\/'))
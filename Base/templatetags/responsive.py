@@ -0,0 +1,75 @@
+"""
+``{% picture %}`` renders a static image as ``<picture>`` markup with
+``srcset`` candidates for the variants built by ``Base.storage`` at
+collectstatic time. Without a built index (e.g. in development) it falls back
+to a plain ``<img>``, still carrying the intrinsic width and height.
+"""
+
+import json
+
+from django import template
+from django.conf import settings
+from django.contrib.staticfiles import finders
+from django.contrib.staticfiles.storage import staticfiles_storage
+from django.templatetags.static import static
+from django.utils.html import format_html, format_html_join
+from PIL import Image
+
+register = template.Library()
+
+MIME_TYPES = {'avif': 'image/avif', 'webp': 'image/webp'}
+
+_index = {}
+
+
+def image_index():
+    """Return the variant index, reloaded whenever the manifest changes."""
+    manifest_hash = getattr(staticfiles_storage, 'manifest_hash', '')
+    if manifest_hash not in _index:
+        try:
+            with staticfiles_storage.open(settings.RESPONSIVE_IMAGE_INDEX) as fh:
+                data = json.load(fh)
+        except (OSError, ValueError):
+            data = {}
+        _index.clear()
+        _index[manifest_hash] = data
+    return _index[manifest_hash]
+
+
+def image_info(name):
+    info = image_index().get(name)
+    if info is None:
+        info = {'variants': []}
+        path = finders.find(name)
+        if path:
+            with Image.open(path) as image:
+                info['width'], info['height'] = image.size
+        image_index()[name] = info
+    return info
+
+
+@register.simple_tag
+def picture(name, alt='', sizes='100vw', loading='lazy', **attrs):
+    info = image_info(name)
+    sources = []
+    for fmt, mime in MIME_TYPES.items():
+        candidates = [v for v in info['variants'] if v['format'] == fmt]
+        if candidates:
+            srcset = ', '.join('%s %dw' % (static(v['name']), v['width']) for v in candidates)
+            sources.append((mime, srcset, sizes))
+    img = format_html(
+        '<img src="{}" alt="{}"{} loading="{}" decoding="async"{}>',
+        static(name),
+        alt,
+        format_html(' width="{}" height="{}"', info['width'], info['height'])
+        if 'width' in info else '',
+        loading,
+        format_html_join('', ' {}="{}"', attrs.items()),
+    )
+    if not sources:
+        return img
+    return format_html(
+        '<picture>{}{}</picture>',
+        format_html_join('', '<source type="{}" srcset="{}" sizes="{}">', sources),
+        img,
+    )
@@ -1,3 +1,767 @@
-from django.test import TestCase
+import csv
+import gzip
+import json
+import os
+import re
+import sqlite3
+import subprocess
+import sys
+import tempfile
+from collections import deque
+from io import BytesIO, StringIO
+from pathlib import Path
+from unittest import mock
 
-# Create your tests here.
+from django.contrib.messages import constants
+from django.contrib.messages.storage.cookie import CookieStorage
+from django.contrib.staticfiles.storage import staticfiles_storage
+from django.core.cache import cache, caches
+from django.conf import settings
+from django.core.management import CommandError, call_command
+from django.contrib.auth.models import User
+from django.db import connection
+from django.http import HttpResponse
+from django.test.utils import CaptureQueriesContext
+from django.utils import timezone
+from django.test import RequestFactory, SimpleTestCase, TestCase, override_settings
+
+from Base import exports, metrics, page_cache, submissions, throttle
+from Base.models import contact
+from Base.loaders import minify_html
+from Base.management.commands import bench, prerender
+from Base.templatetags import inline_static, responsive
+from whitenoise.middleware import WhiteNoiseFileResponse
+
+# Templates are rendered without a collectstatic run, so there is no manifest.
+STATIC_STORAGES = {
+    'default': {'BACKEND': 'django.core.files.storage.FileSystemStorage'},
+    'staticfiles': {'BACKEND': 'django.contrib.staticfiles.storage.StaticFilesStorage'},
+}
+
+
+def migrate_database(path):
+    """Create a migrated SQLite database at ``path``; return its environment."""
+    env = dict(
+        os.environ,
+        DATABASE_URL='sqlite:///' + str(path),
+        DJANGO_SETTINGS_MODULE='portfolio.settings',
+    )
+    subprocess.run(
+        [sys.executable, 'manage.py', 'migrate', '--verbosity', '0'],
+        cwd=settings.BASE_DIR, env=env, check=True,
+    )
+    return env
+
+
+VALID_POST = {
+    'name': 'Ada',
+    'email': 'ada@example.com',
+    'content': 'Hello there',
+    'number': '5551234',
+}
+
+
+@override_settings(STORAGES=STATIC_STORAGES)
+class PageCacheTests(SimpleTestCase):
+    def setUp(self):
+        cache.clear()
+
+    def test_get_is_served_with_validators(self):
+        response = self.client.get('/')
+        self.assertEqual(response.status_code, 200)
+        self.assertTrue(response.has_header('ETag'))
+        self.assertTrue(response.has_header('Last-Modified'))
+        self.assertContains(response, 'csrfmiddlewaretoken')
+        self.assertNotContains(response, page_cache.CSRF_PLACEHOLDER)
+
+    def test_second_get_skips_template_engine(self):
+        self.client.get('/')
+        with self.assertTemplateNotUsed('home.html'):
+            response = self.client.get('/')
+        self.assertEqual(response.status_code, 200)
+
+    def test_conditional_get_returns_not_modified(self):
+        etag = self.client.get('/')['ETag']
+        response = self.client.get('/', HTTP_IF_NONE_MATCH=etag)
+        self.assertEqual(response.status_code, 304)
+        self.assertEqual(response['ETag'], etag)
+
+    def test_etag_changes_with_csrf_cookie(self):
+        etag = self.client.get('/')['ETag']
+        self.client.cookies.clear()
+        response = self.client.get('/', HTTP_IF_NONE_MATCH=etag)
+        self.assertEqual(response.status_code, 200)
+        self.assertNotEqual(response['ETag'], etag)
+
+    def test_if_modified_since_alone_does_not_revalidate(self):
+        last_modified = self.client.get('/')['Last-Modified']
+        self.client.cookies.clear()
+        response = self.client.get('/', HTTP_IF_MODIFIED_SINCE=last_modified)
+        self.assertEqual(response.status_code, 200)
+        self.assertContains(response, 'csrfmiddlewaretoken')
+
+    def test_pending_messages_bypass_cache(self):
+        request = RequestFactory().get('/')
+        request._messages = CookieStorage(request)
+        self.assertTrue(page_cache.is_cacheable(request))
+        request._messages.add(constants.ERROR, 'Invalid email try again')
+        self.assertFalse(page_cache.is_cacheable(request))
+
+
+@override_settings(STORAGES=STATIC_STORAGES)
+class LeanAnonymousTests(SimpleTestCase):
+    """SimpleTestCase fails on any database access, so these assert zero queries."""
+
+    def setUp(self):
+        cache.clear()
+
+    def test_get_does_not_touch_database(self):
+        self.assertEqual(self.client.get('/').status_code, 200)
+        self.assertEqual(self.client.get('/').status_code, 200)
+
+    def test_get_with_cookies_does_not_touch_database(self):
+        self.client.get('/')
+        self.client.cookies['sessionid'] = 'stale-session-key'
+        self.client.cookies['messages'] = 'stale-messages'
+        self.assertEqual(self.client.get('/').status_code, 200)
+
+
+@override_settings(STORAGES=STATIC_STORAGES)
+class ContactPostTests(TestCase):
+    def setUp(self):
+        caches['throttle'].clear()
+
+    def test_valid_post_is_saved(self):
+        response = self.client.post('/', VALID_POST)
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(contact.objects.count(), 1)
+
+    def test_post_does_not_create_a_session(self):
+        from django.contrib.sessions.models import Session
+
+        response = self.client.post('/', VALID_POST)
+        self.assertIn('messages', response.cookies)
+        self.assertNotIn(settings.SESSION_COOKIE_NAME, response.cookies)
+        self.assertEqual(Session.objects.count(), 0)
+
+    def test_invalid_post_reports_errors(self):
+        response = self.client.post('/', dict(VALID_POST, name='', number='12345678901234'))
+        self.assertEqual(contact.objects.count(), 0)
+        errors = [str(m) for m in response.wsgi_request._messages]
+        self.assertIn('Name should be between 1 and 30 characters', errors)
+        self.assertIn('Invalid number', errors)
+
+    @override_settings(CONTACT_QUEUE_ENABLED=True)
+    def test_queued_post_is_written_on_flush(self):
+        spool_dir = tempfile.TemporaryDirectory()
+        self.addCleanup(spool_dir.cleanup)
+        queue = submissions.SubmissionQueue(spool_dir.name, batch_size=10, flush_interval=0)
+        # Close inside the test: the atexit hook would flush into the real database.
+        self.addCleanup(queue.close)
+        with mock.patch.object(submissions, 'get_queue', return_value=queue):
+            self.client.post('/', VALID_POST)
+        self.assertEqual(contact.objects.count(), 0)
+        self.assertEqual(queue.flush(), 1)
+        self.assertEqual(contact.objects.get().email, 'ada@example.com')
+
+
+@override_settings(STORAGES=STATIC_STORAGES, CONTACT_THROTTLE_BURST=2)
+class ThrottleTests(TestCase):
+    def setUp(self):
+        caches['throttle'].clear()
+
+    def post(self, ip='10.0.0.1', **data):
+        return self.client.post('/', dict(VALID_POST, **data), REMOTE_ADDR=ip)
+
+    def test_ip_is_throttled_after_burst(self):
+        self.assertEqual(self.post(content='first').status_code, 200)
+        self.assertEqual(self.post(content='second', email='b@example.com').status_code, 200)
+        self.assertEqual(self.post(content='third', email='c@example.com').status_code, 429)
+        self.assertEqual(contact.objects.count(), 2)
+
+    def test_email_is_throttled_across_ips(self):
+        self.post(ip='10.0.0.1', content='first')
+        self.post(ip='10.0.0.2', content='second', email='ADA@example.com ')
+        self.assertEqual(self.post(ip='10.0.0.3', content='third').status_code, 429)
+
+    def test_duplicate_submission_is_not_written(self):
+        self.post(content='Hello   there')
+        response = self.post(ip='10.0.0.2', content='hello there')
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(contact.objects.count(), 1)
+
+    def test_client_ip_behind_trusted_proxies(self):
+        request = RequestFactory().get(
+            '/', REMOTE_ADDR='10.1.1.1', HTTP_X_FORWARDED_FOR='6.6.6.6, 1.2.3.4, 10.2.2.2')
+        self.assertEqual(throttle.client_ip(request), '10.1.1.1')
+        with override_settings(TRUSTED_PROXY_COUNT=1):
+            self.assertEqual(throttle.client_ip(request), '10.2.2.2')
+        with override_settings(TRUSTED_PROXY_COUNT=2):
+            self.assertEqual(throttle.client_ip(request), '1.2.3.4')
+        with override_settings(TRUSTED_PROXY_COUNT=4):
+            self.assertEqual(throttle.client_ip(request), '10.1.1.1')
+
+    def test_failed_save_does_not_mark_duplicate(self):
+        with mock.patch('Base.forms.ContactForm.save', side_effect=RuntimeError('locked')):
+            with self.assertRaises(RuntimeError):
+                self.post(content='Hello there')
+        self.assertEqual(self.post(ip='10.0.0.2', content='Hello there').status_code, 200)
+        self.assertEqual(contact.objects.count(), 1)
+
+    def test_bucket_refills(self):
+        cache = caches['throttle']
+        self.assertTrue(throttle.take_token(cache, 'k', rate=1 / 60, burst=1))
+        self.assertFalse(throttle.take_token(cache, 'k', rate=1 / 60, burst=1))
+        later = throttle.time.time() + 61
+        with mock.patch('Base.throttle.time.time', return_value=later):
+            self.assertTrue(throttle.take_token(cache, 'k', rate=1 / 60, burst=1))
+
+
+class ResponsiveImageTests(SimpleTestCase):
+    def setUp(self):
+        self._tmp = tempfile.TemporaryDirectory()
+        self.addCleanup(self._tmp.cleanup)
+        responsive._index.clear()
+        self.addCleanup(responsive._index.clear)
+
+    def test_collectstatic_builds_variants_and_srcset(self):
+        with override_settings(STATIC_ROOT=self._tmp.name, RESPONSIVE_IMAGE_FORMATS=['webp']):
+            call_command('collectstatic', interactive=False, verbosity=0)
+            html = responsive.picture('images/mypic.png', sizes='50vw')
+            manifest = json.loads((Path(self._tmp.name) / 'staticfiles.json').read_text())
+
+        self.assertIn('images/mypic-320w.webp', manifest['paths'])
+        self.assertIn('images/mypic-554w.webp', manifest['paths'])
+        self.assertNotIn('images/dog-320w.webp', manifest['paths'])
+        self.assertIn('<source type="image/webp" srcset="/static/images/mypic-320w.', html)
+        self.assertIn(' 554w" sizes="50vw">', html)
+        self.assertIn('width="554" height="450"', html)
+
+    def test_repeated_collectstatic_replaces_index(self):
+        root = Path(self._tmp.name)
+        with override_settings(STATIC_ROOT=self._tmp.name, RESPONSIVE_IMAGE_FORMATS=['webp']):
+            call_command('collectstatic', interactive=False, verbosity=0)
+            with override_settings(RESPONSIVE_IMAGE_WIDTHS=[480]):
+                call_command('collectstatic', interactive=False, verbosity=0)
+        self.assertEqual([path.name for path in root.glob('responsive-images*.json')],
+                         ['responsive-images.json'])
+        index = json.loads((root / 'responsive-images.json').read_text())
+        widths = [variant['width'] for variant in index['images/mypic.png']['variants']]
+        self.assertEqual(widths, [480, 554])
+
+    def test_fallback_without_index_keeps_intrinsic_size(self):
+        # An empty STATIC_ROOT, so an index left by a real collectstatic is not read.
+        with override_settings(STORAGES=STATIC_STORAGES, STATIC_ROOT=self._tmp.name):
+            html = responsive.picture('images/dog.png', alt='Dog', style='width: 60%;')
+        self.assertEqual(
+            html,
+            '<img src="/static/images/dog.png" alt="Dog" width="225" height="225" '
+            'loading="lazy" decoding="async" style="width: 60%;">',
+        )
+
+
+class TemplateOptimizationTests(SimpleTestCase):
+    def test_minify_html_collapses_whitespace_and_comments(self):
+        source = '<div>\n    <!-- note -->\n    <p>Hi  there</p>\n</div>\n'
+        self.assertEqual(minify_html(source), '<div> <p>Hi there</p> </div>')
+
+    def test_minify_html_preserves_sensitive_blocks(self):
+        source = '<p>a   b</p>\n<textarea>\n  keep\n</textarea>\n<pre> x\n y</pre>'
+        self.assertEqual(
+            minify_html(source),
+            '<p>a b</p> <textarea>\n  keep\n</textarea> <pre> x\n y</pre>',
+        )
+
+    def test_minify_css(self):
+        css = '/* c */\n.a > .b ,\n.c {\n  color: red;\n  margin: 0 auto;\n}\n'
+        self.assertEqual(inline_static.minify_css(css), '.a>.b,.c{color:red;margin:0 auto}')
+
+    def test_relative_urls_after_collectstatic(self):
+        with tempfile.TemporaryDirectory() as source, tempfile.TemporaryDirectory() as root:
+            (Path(source) / 'css').mkdir()
+            (Path(source) / 'img').mkdir()
+            (Path(source) / 'css' / 'x.css').write_text('.a { background: url("../img/bg.svg"); }')
+            (Path(source) / 'img' / 'bg.svg').write_text('<svg xmlns="http://www.w3.org/2000/svg"/>')
+            with override_settings(STATICFILES_DIRS=[source], STATIC_ROOT=root):
+                call_command('collectstatic', interactive=False, verbosity=0)
+                inline_static._cache.clear()
+                css = inline_static.inline_css_text('css/x.css')
+                expected = staticfiles_storage.url('img/bg.svg')
+        self.assertRegex(expected, r'^/static/img/bg\.[0-9a-f]{12}\.svg$')
+        self.assertEqual(css, '.a{background:url(%s)}' % expected)
+
+    @override_settings(STORAGES=STATIC_STORAGES)
+    def test_page_inlines_stylesheet(self):
+        cache.clear()
+        response = self.client.get('/')
+        self.assertContains(response, '<style>@import url(')
+        self.assertNotContains(response, 'css/style.css')
+        self.assertNotContains(response, '<!-- Navbar Section -->')
+
+
+@override_settings(STORAGES=STATIC_STORAGES)
+class MetricsTests(TestCase):
+    def setUp(self):
+        cache.clear()
+        caches['throttle'].clear()
+
+    def test_server_timing_header(self):
+        timing = self.client.get('/')['Server-Timing']
+        for phase in ('pre;', 'view;', 'tmpl;', 'db;', 'total;'):
+            self.assertIn(phase, timing)
+        self.assertIn('desc="0 queries"', timing)
+
+    def test_queries_are_counted(self):
+        timing = self.client.post('/', VALID_POST)['Server-Timing']
+        self.assertNotIn('desc="0 queries"', timing)
+
+    def test_metrics_endpoint_reports_views(self):
+        self.client.get('/')
+        body = self.client.get('/metrics').content.decode()
+        self.assertIn('# TYPE portfolio_request_duration_seconds histogram', body)
+        self.assertIn('portfolio_request_duration_seconds_count{pid="%d",view="Base.views.contact"}'
+                      % os.getpid(), body)
+        self.assertIn('portfolio_metrics_dropped_total{pid="%d"}' % os.getpid(), body)
+
+    def test_metrics_endpoint_is_restricted(self):
+        self.assertEqual(self.client.get('/metrics', REMOTE_ADDR='10.9.9.9').status_code, 404)
+        with override_settings(METRICS_TOKEN='s3cret'):
+            response = self.client.get('/metrics', REMOTE_ADDR='10.9.9.9',
+                                       HTTP_AUTHORIZATION='Bearer s3cret')
+            self.assertEqual(response.status_code, 200)
+            response = self.client.get('/metrics', REMOTE_ADDR='10.9.9.9',
+                                       HTTP_AUTHORIZATION='Bearer wrong')
+            self.assertEqual(response.status_code, 404)
+        with override_settings(METRICS_ENABLED=False):
+            self.assertEqual(self.client.get('/metrics').status_code, 404)
+
+    def test_static_responses_are_labelled(self):
+        request = RequestFactory().get('/static/css/style.css')
+        response = WhiteNoiseFileResponse(BytesIO(b''))
+        self.assertEqual(metrics._view_label(request, response), 'static')
+        self.assertEqual(metrics._view_label(request, HttpResponse()), 'unresolved')
+
+    def test_registry_counts_dropped_samples(self):
+        registry = metrics.Registry()
+        registry.drain(deque([(1, 'v', 0.002, 0), (4, 'v', 0.2, 3)]))
+        self.assertEqual(registry.dropped, 2)
+        histogram = registry.views['v']
+        self.assertEqual(histogram.count, 2)
+        self.assertEqual(histogram.queries, 3)
+        self.assertEqual(histogram.buckets[0], 1)
+        self.assertEqual(histogram.buckets[-1], 2)
+
+
+class BenchCommandTests(SimpleTestCase):
+    # The benchmark threads open their own connections to a copy of db.sqlite3.
+    databases = {'default'}
+
+    def test_percentile(self):
+        values = list(range(1, 101))
+        self.assertEqual(bench.percentile(values, 50), 50)
+        self.assertEqual(bench.percentile(values, 99), 99)
+        self.assertEqual(bench.percentile([], 50), 0.0)
+
+    def test_compare_flags_regressions_beyond_threshold(self):
+        old = {'GET': {'rps': 100.0, 'p50_ms': 2.0, 'p95_ms': 5.0, 'p99_ms': 9.0,
+                       'queries_per_request': 0.0}}
+        new = {'GET': {'rps': 95.0, 'p50_ms': 2.1, 'p95_ms': 7.0, 'p99_ms': 9.0,
+                       'queries_per_request': 1.0}}
+        regressions = bench.compare(old, new, threshold=0.10)
+        self.assertEqual(len(regressions), 2)
+        self.assertIn('GET p95_ms', regressions[0])
+        self.assertIn('queries/request', regressions[1])
+
+    def test_compare_flags_error_rate(self):
+        old = {'GET': {'rps': 100.0, 'error_rate': 0.0}}
+        new = {'GET': {'rps': 200.0, 'error_rate': 0.5}}
+        self.assertEqual(bench.compare(old, new, threshold=0.10),
+                         ['GET error rate 0.0% -> 50.0%'])
+
+    @override_settings(STORAGES=STATIC_STORAGES)
+    def test_run_against_database_copy(self):
+        cache.clear()
+        caches['throttle'].clear()
+        with tempfile.TemporaryDirectory() as tmpdir:
+            database = Path(tmpdir) / 'source.sqlite3'
+            migrate_database(database)
+            baseline = Path(tmpdir) / 'baseline.json'
+            call_command(
+                'bench', requests=10, threads=2, post_ratio=0.5,
+                database=str(database),
+                save_baseline=str(baseline), stdout=StringIO(),
+            )
+            results = json.loads(baseline.read_text())['results']
+            self.assertEqual(results['total']['requests'], 20)
+            self.assertEqual(results['GET']['errors'], 0)
+            self.assertEqual(results['POST']['errors'], 0)
+            self.assertEqual(results['POST']['queries_per_request'], 1)
+            # Only the copy was written to, through connections of its own.
+            self.assertEqual(contact.objects.count(), 0)
+            self.assertNotEqual(connection.settings_dict['NAME'], str(database))
+
+            # Without a manifest every GET fails: no baseline may be written.
+            broken = Path(tmpdir) / 'broken.json'
+            cache.clear()
+            storages = dict(STATIC_STORAGES, staticfiles={
+                'BACKEND': 'Base.storage.ResponsiveStaticFilesStorage'})
+            with override_settings(STORAGES=storages, STATIC_ROOT=tmpdir), \
+                    self.assertRaisesMessage(CommandError, 'failed with status >= 400'):
+                call_command(
+                    'bench', requests=5, threads=1, post_ratio=0, database=str(database),
+                    save_baseline=str(broken), stdout=StringIO(),
+                )
+            self.assertFalse(broken.exists())
+
+            results['GET']['p50_ms'] = results['GET']['p50_ms'] / 1000
+            baseline.write_text(json.dumps({'results': results}))
+            with self.assertRaisesMessage(CommandError, 'GET p50_ms'):
+                call_command(
+                    'bench', requests=10, threads=2, post_ratio=0.5,
+                    database=str(database),
+                    baseline=str(baseline), stdout=StringIO(),
+                )
+
+
+class SubmissionQueueTests(TestCase):
+    def setUp(self):
+        self._tmp = tempfile.TemporaryDirectory()
+        self.spool_dir = Path(self._tmp.name)
+        self.addCleanup(self._tmp.cleanup)
+
+    def make_queue(self, **kwargs):
+        kwargs.setdefault('flush_interval', 0)
+        queue = submissions.SubmissionQueue(self.spool_dir, **kwargs)
+        self.addCleanup(queue.close)
+        return queue
+
+    def test_rows_are_spooled_until_flush(self):
+        queue = self.make_queue(batch_size=10)
+        queue.put(VALID_POST)
+        queue.put(VALID_POST)
+        self.assertEqual(contact.objects.count(), 0)
+        self.assertEqual(len(queue.spool_path.read_text().splitlines()), 2)
+        self.assertEqual(queue.flush(), 2)
+        self.assertEqual(contact.objects.count(), 2)
+        self.assertEqual(queue.spool_path.read_text(), '')
+
+    def test_full_batch_is_flushed(self):
+        queue = self.make_queue(batch_size=3)
+        for _ in range(3):
+            queue.put(VALID_POST)
+        self.assertEqual(contact.objects.count(), 3)
+        self.assertEqual(len(queue), 0)
+
+    def test_close_flushes_pending_rows(self):
+        queue = self.make_queue(batch_size=10)
+        queue.put(VALID_POST)
+        queue.close()
+        self.assertEqual(contact.objects.count(), 1)
+        self.assertFalse(queue.spool_path.exists())
+
+    def test_spool_of_dead_process_is_recovered(self):
+        child = subprocess.Popen([sys.executable, '-c', 'pass'])
+        child.wait()
+        spool = self.spool_dir / f'contact-{child.pid}.jsonl'
+        spool.write_text(json.dumps(VALID_POST) + '\n')
+        self.make_queue().put(dict(VALID_POST, name='Grace'))
+        self.assertEqual(contact.objects.filter(name='Ada').count(), 1)
+        self.assertFalse(spool.exists())
+
+    def test_leftover_spool_with_own_pid_is_recovered(self):
+        # A restarted container can reuse the pid of the process that wrote it.
+        spool = self.spool_dir / f'contact-{os.getpid()}.jsonl'
+        spool.write_text(json.dumps(VALID_POST) + '\n')
+        queue = self.make_queue()
+        queue.put(dict(VALID_POST, name='Grace'))
+        queue.flush()
+        self.assertEqual(sorted(contact.objects.values_list('name', flat=True)), ['Ada', 'Grace'])
+
+    def test_torn_line_is_skipped(self):
+        child = subprocess.Popen([sys.executable, '-c', 'pass'])
+        child.wait()
+        spool = self.spool_dir / f'contact-{child.pid}.jsonl'
+        spool.write_text(json.dumps(VALID_POST) + '\n{"name": "Gra')
+        with self.assertLogs('Base.submissions', 'WARNING'):
+            self.make_queue().put(dict(VALID_POST, name='Grace'))
+        self.assertEqual(contact.objects.filter(name='Ada').count(), 1)
+        self.assertEqual(list(self.spool_dir.iterdir()), [self.spool_dir / f'contact-{os.getpid()}.jsonl'])
+
+    def test_failed_recovery_keeps_claimed_file_and_is_retried(self):
+        child = subprocess.Popen([sys.executable, '-c', 'pass'])
+        child.wait()
+        spool = self.spool_dir / f'contact-{child.pid}.jsonl'
+        spool.write_text(json.dumps(VALID_POST) + '\n')
+        queue = self.make_queue(batch_size=10)
+        with mock.patch.object(contact.objects, 'bulk_create', side_effect=RuntimeError), \
+                self.assertLogs('Base.submissions', 'ERROR'):
+            queue.put(dict(VALID_POST, name='Grace'))
+        claimed = self.spool_dir / f'contact-{child.pid}.jsonl.recovering-{os.getpid()}'
+        self.assertTrue(claimed.exists())
+        self.assertEqual(queue.flush(), 1)
+        self.assertFalse(claimed.exists())
+        self.assertEqual(sorted(contact.objects.values_list('name', flat=True)), ['Ada', 'Grace'])
+
+
+@override_settings(STORAGES=STATIC_STORAGES)
+class ContactAdminTests(TestCase):
+    url = '/admin/Base/contact/'
+
+    @classmethod
+    def setUpTestData(cls):
+        contact.objects.bulk_create(
+            contact(name='N%d' % i, email='user%d@example.com' % i, content='hi', number='1')
+            for i in range(120)
+        )
+
+    def setUp(self):
+        self.client.force_login(User.objects.create_superuser('admin', 'a@example.com', 'pw'))
+
+    def test_changelist_uses_keyset_pagination(self):
+        with CaptureQueriesContext(connection) as queries:
+            response = self.client.get(self.url)
+        sql = ' '.join(query['sql'] for query in queries).upper()
+        self.assertNotIn('COUNT(', sql)
+        self.assertNotIn('OFFSET', sql)
+
+        first_page = response.context['cl'].result_list
+        self.assertEqual(len(first_page), 50)
+        newest = contact.objects.order_by('-pk')
+        self.assertEqual(first_page[0], newest[0])
+        self.assertEqual(response.context['next_page_url'], '?before=%d' % first_page[-1].pk)
+
+        response = self.client.get(self.url + response.context['next_page_url'])
+        self.assertEqual(response.context['cl'].result_list[0], newest[50])
+        self.assertContains(response, 'Older')
+        self.assertContains(response, 'Newest')
+
+    def test_search_is_exact_or_prefix_on_email(self):
+        response = self.client.get(self.url, {'q': 'USER7@example.com'})
+        self.assertEqual([c.email for c in response.context['cl'].result_list], ['user7@example.com'])
+
+        response = self.client.get(self.url, {'q': 'user11'})
+        emails = {c.email for c in response.context['cl'].result_list}
+        self.assertEqual(emails, {'user11@example.com'} | {'user11%d@example.com' % i for i in range(10)})
+
+    def test_count_is_exact_for_searches_and_short_pages(self):
+        response = self.client.get(self.url)
+        self.assertEqual(response.context['cl'].result_count, contact.objects.latest('pk').pk)
+
+        response = self.client.get(self.url, {'q': 'user119@example.com'})
+        self.assertEqual(response.context['cl'].result_count, 1)
+        self.assertContains(response, 'about 1 contact<')
+
+        response = self.client.get(self.url, {'q': 'user'})
+        self.assertEqual(response.context['cl'].result_count, 120)
+
+        last = contact.objects.order_by('pk')[10].pk
+        response = self.client.get(self.url, {'before': last})
+        self.assertEqual(response.context['cl'].result_count, 10)
+
+    def test_queued_rows_keep_submission_time(self):
+        with tempfile.TemporaryDirectory() as spool_dir:
+            queue = submissions.SubmissionQueue(spool_dir, batch_size=10, flush_interval=0)
+            self.addCleanup(queue.close)
+            queue.put(VALID_POST)
+            spooled = json.loads(queue.spool_path.read_text())
+            queue.flush()
+        row = contact.objects.get(email=VALID_POST['email'])
+        self.assertEqual(row.created_at.isoformat(), spooled['created_at'])
+
+
+class ExportTests(TestCase):
+    @classmethod
+    def setUpTestData(cls):
+        contact.objects.bulk_create(
+            contact(name='N%d' % i, email='user%d@example.com' % i, content='hi, "there"\nbye',
+                    number='1')
+            for i in range(5)
+        )
+
+    def setUp(self):
+        self._tmp = tempfile.TemporaryDirectory()
+        self.tmp = Path(self._tmp.name)
+        self.addCleanup(self._tmp.cleanup)
+
+    def test_csv_export(self):
+        output = self.tmp / 'contacts.csv'
+        call_command('export_contacts', output=str(output))
+        with open(output, newline='') as fh:
+            rows = list(csv.DictReader(fh))
+        self.assertEqual([row['name'] for row in rows], ['N%d' % i for i in range(5)])
+        self.assertEqual(rows[0]['content'], 'hi, "there"\nbye')
+
+    def test_gzipped_jsonl_export_with_cursor_file(self):
+        output = self.tmp / 'contacts.jsonl.gz'
+        cursor_file = self.tmp / 'cursor'
+        first, *rest = contact.objects.order_by('pk')
+        cursor_file.write_text('%d\n' % first.pk)
+
+        call_command('export_contacts', format='jsonl', gzip=True, output=str(output),
+                     cursor_file=str(cursor_file))
+        rows = [json.loads(line) for line in gzip.decompress(output.read_bytes()).splitlines()]
+        self.assertEqual([row['id'] for row in rows], [obj.pk for obj in rest])
+        self.assertEqual(cursor_file.read_text(), '%d\n' % rest[-1].pk)
+
+        # Nothing new since the last run: an empty export, cursor unchanged.
+        call_command('export_contacts', format='jsonl', output=str(output),
+                     cursor_file=str(cursor_file))
+        self.assertEqual(output.read_bytes(), b'')
+        self.assertEqual(cursor_file.read_text(), '%d\n' % rest[-1].pk)
+
+    def test_since_timestamp(self):
+        cutoff = timezone.now()
+        contact.objects.create(name='Late', email='late@example.com', content='hi', number='1')
+        output = self.tmp / 'late.jsonl'
+        call_command('export_contacts', format='jsonl', output=str(output),
+                     since=cutoff.isoformat())
+        self.assertEqual([json.loads(line)['name'] for line in output.read_text().splitlines()],
+                         ['Late'])
+
+    @override_settings(STORAGES=STATIC_STORAGES)
+    def test_csv_escapes_formulas(self):
+        contact.objects.create(name='=HYPERLINK("http://evil")', email='x@example.com',
+                               content='@SUM(A1)', number='+15551234')
+        output = self.tmp / 'contacts.csv'
+        call_command('export_contacts', output=str(output))
+        with open(output, newline='') as fh:
+            row = list(csv.DictReader(fh))[-1]
+        self.assertEqual(row['name'], '\'=HYPERLINK("http://evil")')
+        self.assertEqual(row['content'], "'@SUM(A1)")
+        self.assertEqual(row['number'], "'+15551234")
+        self.assertEqual(row['email'], 'x@example.com')
+
+    def test_accepts_gzip(self):
+        self.assertTrue(exports.accepts_gzip('gzip, deflate'))
+        self.assertTrue(exports.accepts_gzip('br;q=1.0, gzip;q=0.5'))
+        self.assertFalse(exports.accepts_gzip('gzip;q=0, deflate'))
+        self.assertFalse(exports.accepts_gzip('GZIP; q=0.000'))
+        self.assertFalse(exports.accepts_gzip('identity'))
+        self.assertFalse(exports.accepts_gzip(''))
+
+    def test_admin_action_streams_gzip(self):
+        self.client.force_login(User.objects.create_superuser('admin', 'a@example.com', 'pw'))
+        selected = list(contact.objects.values_list('pk', flat=True)[:2])
+        response = self.client.post(
+            '/admin/Base/contact/',
+            {'action': 'export_csv', '_selected_action': selected},
+            HTTP_ACCEPT_ENCODING='gzip, deflate',
+        )
+        self.assertTrue(response.streaming)
+        self.assertEqual(response['Content-Encoding'], 'gzip')
+        body = gzip.decompress(b''.join(response.streaming_content)).decode()
+        self.assertEqual(len(list(csv.DictReader(StringIO(body)))), 2)
+
+
+WRITER_SCRIPT = """
+import django
+django.setup()
+from django.db import transaction
+from Base.models import contact
+for index in range(%(rows)d):
+    with transaction.atomic():
+        contact.objects.create(
+            name='Writer', email='w%%d@ex.com' %% index, content='row %%d' %% index, number='555')
+"""
+
+
+class SqliteProfileTests(SimpleTestCase):
+    databases = {'default'}
+
+    def test_pragmas_are_applied_on_connect(self):
+        with connection.cursor() as cursor:
+            cursor.execute('PRAGMA synchronous')
+            self.assertEqual(cursor.fetchone()[0], 1)  # NORMAL
+            cursor.execute('PRAGMA busy_timeout')
+            self.assertEqual(cursor.fetchone()[0], settings.SQLITE_PRAGMAS['busy_timeout'])
+        self.assertEqual(connection.settings_dict['OPTIONS']['transaction_mode'], 'IMMEDIATE')
+        self.assertNotIn('sslmode', connection.settings_dict['OPTIONS'])
+
+    def test_concurrent_writer_processes(self):
+        writers, rows = 4, 50
+        with tempfile.TemporaryDirectory() as tmpdir:
+            db_path = os.path.join(tmpdir, 'writers.sqlite3')
+            env = migrate_database(db_path)
+            processes = [
+                subprocess.Popen(
+                    [sys.executable, '-c', WRITER_SCRIPT % {'rows': rows}],
+                    cwd=settings.BASE_DIR, env=env,
+                    stdout=subprocess.PIPE, stderr=subprocess.PIPE, text=True,
+                )
+                for _ in range(writers)
+            ]
+            for process in processes:
+                _, stderr = process.communicate(timeout=120)
+                self.assertNotIn('database is locked', stderr)
+                self.assertEqual(process.returncode, 0, stderr)
+
+            with sqlite3.connect(db_path) as db:
+                self.assertEqual(db.execute('PRAGMA journal_mode').fetchone()[0], 'wal')
+                count = db.execute('SELECT COUNT(*) FROM Base_contact').fetchone()[0]
+            self.assertEqual(count, writers * rows)
+
+
+@override_settings(STORAGES=STATIC_STORAGES)
+class PrerenderTests(TestCase):
+    def setUp(self):
+        self._tmp = tempfile.TemporaryDirectory()
+        self.tmp = Path(self._tmp.name)
+        self.addCleanup(self._tmp.cleanup)
+
+    def test_writes_page_and_compressed_siblings(self):
+        call_command('prerender', output=str(self.tmp), stdout=StringIO(), stderr=StringIO())
+        page = (self.tmp / 'index.html').read_bytes()
+        self.assertIn(b'data-csrf-url="/csrf"', page)
+        self.assertIn(b'action="/contact/"', page)
+        self.assertIn(b'name="csrfmiddlewaretoken" value=""', page)
+        self.assertEqual(gzip.decompress((self.tmp / 'index.html.gz').read_bytes()), page)
+        self.assertEqual(prerender.brotli.decompress((self.tmp / 'index.html.br').read_bytes()), page)
+
+    def test_csrf_token_endpoint_allows_post(self):
+        client = self.client_class(enforce_csrf_checks=True)
+        response = client.get('/csrf')
+        self.assertIn('no-store', response['Cache-Control'])
+        self.assertIn(settings.CSRF_COOKIE_NAME, response.cookies)
+        response = client.post('/contact/', dict(VALID_POST, csrfmiddlewaretoken=response.json()['token']))
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(contact.objects.count(), 1)
+
+
+@override_settings(STORAGES=STATIC_STORAGES)
+class WarmupTests(SimpleTestCase):
+    databases = {'default'}
+
+    def test_warm_up_renders_templates_and_closes_connections(self):
+        from Base import warmup
+
+        inline_static._cache.clear()
+        # The in-memory test database ignores close(), so check the call instead.
+        with mock.patch.object(warmup.connections, 'close_all') as close_all, \
+                self.assertNoLogs('Base.warmup', 'WARNING'):
+            warmup.warm_up()
+        close_all.assert_called_once()
+        self.assertTrue(inline_static._cache)
+
+    def test_startup_benchmark(self):
+        with tempfile.TemporaryDirectory() as tmpdir:
+            database = Path(tmpdir) / 'source.sqlite3'
+            migrate_database(database)
+            # The subprocesses render / from a real manifest, built here.
+            static_root = Path(tmpdir) / 'static'
+            storages = dict(STATIC_STORAGES, staticfiles={
+                'BACKEND': 'Base.storage.ResponsiveStaticFilesStorage'})
+            with override_settings(STORAGES=storages, STATIC_ROOT=str(static_root),
+                                   RESPONSIVE_IMAGE_FORMATS=['webp']):
+                call_command('collectstatic', interactive=False, verbosity=0)
+            out = StringIO()
+            with mock.patch.dict(os.environ, STATIC_ROOT=str(static_root)):
+                call_command('bench', startup=True, startup_runs=1,
+                             database=str(database), stdout=out)
+        output = out.getvalue()
+        first_response = {
+            mode: float(ms)
+            for mode, ms in re.findall(r'^(cold|preload|warm) +[\d.]+ +([\d.]+)$', output, re.M)
+        }
+        self.assertEqual(set(first_response), {'cold', 'preload', 'warm'})
+        self.assertLess(first_response['warm'], first_response['cold'])
+        self.assertIn('faster when warmed up', output)
@@ -0,0 +1,91 @@
+"""
+Throttling and duplicate suppression for contact form submissions.
+
+Token buckets are kept per client IP and per normalised email in the
+``CONTACT_THROTTLE_CACHE`` cache, whose LRU culling bounds memory under a flood
+of distinct keys. Recently seen ``(email, content)`` pairs are indexed by hash
+in the same cache so a resubmitted message is dropped before it reaches the
+ORM. The bucket update is a plain read-modify-write, so concurrent requests can
+occasionally both take the last token; that is acceptable for spam control.
+
+With the default LocMemCache every worker keeps its own buckets, so the
+effective limits are multiplied by the number of workers and duplicates sent to
+different workers are not caught; set ``THROTTLE_REDIS_URL`` to share them.
+"""
+
+import hashlib
+import time
+
+from django.conf import settings
+from django.core.cache import caches
+
+
+def client_ip(request):
+    """
+    Return the client's address. Behind ``TRUSTED_PROXY_COUNT`` proxies that
+    each append to ``X-Forwarded-For``, that is the entry added by the
+    outermost one; anything to its left is supplied by the client.
+    """
+    count = settings.TRUSTED_PROXY_COUNT
+    if count:
+        forwarded = [
+            address.strip()
+            for address in request.META.get('HTTP_X_FORWARDED_FOR', '').split(',')
+            if address.strip()
+        ]
+        if len(forwarded) >= count:
+            return forwarded[-count]
+    return request.META.get('REMOTE_ADDR', '')
+
+
+def normalize_email(email):
+    return (email or '').strip().lower()
+
+
+def normalize_content(content):
+    return ' '.join((content or '').split()).lower()
+
+
+def _key(*parts):
+    return 'throttle:' + hashlib.sha256('\0'.join(parts).encode()).hexdigest()
+
+
+def take_token(cache, key, rate, burst):
+    """Take one token from the bucket at ``key``; return False if it is empty."""
+    now = time.time()
+    tokens, stamp = cache.get(key, (burst, now))
+    tokens = min(burst, tokens + (now - stamp) * rate)
+    allowed = tokens >= 1
+    if allowed:
+        tokens -= 1
+    # Keep the bucket only as long as it takes to refill completely.
+    cache.set(key, (tokens, now), int(burst / rate) + 1)
+    return allowed
+
+
+def is_throttled(request, email):
+    if not settings.CONTACT_THROTTLE_ENABLED:
+        return False
+    cache = caches[settings.CONTACT_THROTTLE_CACHE]
+    rate = settings.CONTACT_THROTTLE_RATE
+    burst = settings.CONTACT_THROTTLE_BURST
+    by_ip = take_token(cache, _key('ip', client_ip(request)), rate, burst)
+    by_email = take_token(cache, _key('email', normalize_email(email)), rate, burst)
+    return not (by_ip and by_email)
+
+
+def _content_key(email, content):
+    return _key('content', normalize_email(email), normalize_content(content))
+
+
+def is_duplicate(email, content):
+    """Record ``(email, content)``; return True if it was seen within the window."""
+    if not settings.CONTACT_DUPLICATE_WINDOW:
+        return False
+    cache = caches[settings.CONTACT_THROTTLE_CACHE]
+    return not cache.add(_content_key(email, content), 1, settings.CONTACT_DUPLICATE_WINDOW)
+
+
+def forget_duplicate(email, content):
+    """Undo ``is_duplicate``'s record, e.g. when the message could not be stored."""
+    caches[settings.CONTACT_THROTTLE_CACHE].delete(_content_key(email, content))
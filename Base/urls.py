@@ -2,5 +2,8 @@ from django.urls import path
 from .import views
 
 urlpatterns =[
-    path('',views.contact)
+    path('',views.contact),
+    path('contact/',views.contact,name='contact'),
+    path('csrf',views.csrf,name='csrf'),
+    path('metrics',views.metrics)
 ]
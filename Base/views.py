@@ -1,8 +1,22 @@
+import hmac
+import logging
+
 from django.shortcuts import render
-from django.http import HttpResponse
+from django.http import Http404, HttpResponse, JsonResponse
+from django.middleware.csrf import get_token
+from django.utils.cache import add_never_cache_headers
+from django.conf import settings
 from django.contrib import messages
+from Base import metrics as metrics_registry
 from Base import models
+from Base import page_cache
+from Base import submissions
+from Base import throttle
+from Base.forms import ContactForm
 from Base.models import contact
+
+logger = logging.getLogger(__name__)
+
 # Create your views here.
 
 # def home(request):
@@ -10,39 +24,57 @@ from Base.models import contact
 
 def contact(request):
     if request.method == 'POST':
-        print('post')
-        name = request.POST.get('name')
-        email = request.POST.get('email')
-        content = request.POST.get('content')
-        number = request.POST.get('number')
-        print(name,email,content,number)
-
-        if len(name)>1 and len(name)<30:
-            pass
-        else:
-            messages.error(request,'Name should be between 1 and 30 characters')
-            request.render(request,'home.html')
+        form = ContactForm(request.POST)
 
-        if len(email)>1 and len(email)<30:
-            pass        
-        else:
-            messages.error(request,'Invalid email try again')
-            request.render(request,'home.html')
+        if throttle.is_throttled(request,request.POST.get('email')):
+            logger.info('contact submission throttled',extra={'outcome':'throttled','ip':throttle.client_ip(request)})
+            messages.error(request,'Too many messages, please try again later')
+            response = page_cache.render_cached(request,'home.html')
+            response.status_code = 429
+            return response
 
-        if len(content)>2 and len(content)<400:
-            pass
-        else:
-            messages.error(request,'Content should be between 2 and 400 characters')
-            request.render(request,'home.html')
-        if len(number)>1 and len(number)<13:
-            pass
+        if form.is_valid():
+            if throttle.is_duplicate(form.cleaned_data['email'],form.cleaned_data['content']):
+                logger.info('contact submission duplicate',extra={'outcome':'duplicate'})
+            else:
+                try:
+                    if settings.CONTACT_QUEUE_ENABLED:
+                        submissions.get_queue().put(form.cleaned_data)
+                    else:
+                        form.save()
+                except Exception:
+                    # Otherwise the visitor's retry would be dropped as a duplicate.
+                    throttle.forget_duplicate(form.cleaned_data['email'],form.cleaned_data['content'])
+                    raise
+                logger.info('contact submission accepted',extra={'outcome':'accepted'})
+            messages.success(request,'Thank you for conacting me|| your message has been sent')
         else:
-            messages.error(request,'Invalid number')
-            request.render(request,'home.html')
-        ins=models.contact(name=name,email=email,content=content,number=number)
-        ins.save()
-        messages.success(request,'Thank you for conacting me|| your message has been sent')
-        print('success')
-        print('the requet is  no pass')
-        
-    return render(request,'home.html')
\ No newline at end of file
+            for errors in form.errors.values():
+                for error in errors:
+                    messages.error(request,error)
+            logger.info('contact submission invalid',extra={'outcome':'invalid','fields':sorted(form.errors)})
+
+    return page_cache.render_cached(request,'home.html')
+
+
+def _metrics_allowed(request):
+    if not settings.METRICS_ENABLED:
+        return False
+    if settings.METRICS_TOKEN:
+        expected = 'Bearer ' + settings.METRICS_TOKEN
+        if hmac.compare_digest(request.headers.get('Authorization','').encode(),expected.encode()):
+            return True
+    return throttle.client_ip(request) in settings.METRICS_ALLOWED_IPS
+
+
+def metrics(request):
+    if not _metrics_allowed(request):
+        raise Http404
+    return HttpResponse(metrics_registry.render_metrics(),content_type='text/plain; version=0.0.4; charset=utf-8')
+
+
+def csrf(request):
+    # Used by the prerendered page, which carries no token of its own.
+    response = JsonResponse({'token':get_token(request)})
+    add_never_cache_headers(response)
+    return response
@@ -0,0 +1,54 @@
+"""
+Pre-fork warm-up for the WSGI entry point.
+
+With gunicorn's ``preload_app`` the master imports ``portfolio.wsgi`` once and
+forks its workers from it. Everything done here happens in the master, so the
+workers inherit compiled templates, populated URL resolvers, the staticfiles
+manifest and the responsive image index instead of building them on their
+first request.
+"""
+
+import logging
+import time
+
+from django.conf import settings
+from django.contrib.auth.models import AnonymousUser
+from django.contrib.staticfiles.storage import staticfiles_storage
+from django.db import connections
+from django.http import HttpRequest
+from django.template.loader import get_template, render_to_string
+from django.urls import get_resolver, resolve
+
+from Base.templatetags import responsive
+
+logger = logging.getLogger(__name__)
+
+
+def warm_up():
+    """Build the per-process caches that every worker would otherwise build."""
+    start = time.perf_counter()
+
+    resolver = get_resolver()
+    resolver.reverse_dict  # populates the reverse lookup tables
+    resolve('/')
+
+    # Loads the staticfiles manifest (ManifestStaticFilesStorage reads it on
+    # first access) and the responsive image index that depends on it.
+    getattr(staticfiles_storage, 'manifest_hash', None)
+    responsive.image_index()
+
+    request = HttpRequest()
+    request.method = 'GET'
+    request.path = request.path_info = '/'
+    request.user = AnonymousUser()
+    for template_name in settings.WARMUP_TEMPLATES:
+        get_template(template_name)
+        try:
+            # Rendering also fills the inline CSS cache and loads tag libraries.
+            render_to_string(template_name, request=request)
+        except Exception:
+            logger.warning('warm-up render of %s failed', template_name, exc_info=True)
+
+    # Connections opened above must not be shared by the forked workers.
+    connections.close_all()
+    logger.info('warm-up finished in %.1f ms', (time.perf_counter() - start) * 1000)
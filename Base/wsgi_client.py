@@ -0,0 +1,59 @@
+"""
+Minimal WSGI client used by the ``bench`` command.
+
+It deliberately imports nothing from Django, so the start-up benchmark can load
+it before timing without warming up any part of the framework.
+"""
+
+import io
+import sys
+from http.cookies import SimpleCookie
+
+
+class Client:
+    """Minimal WSGI client with a cookie jar, one per benchmark thread."""
+
+    def __init__(self, application, remote_addr):
+        self.application = application
+        self.remote_addr = remote_addr
+        self.cookies = SimpleCookie()
+
+    def request(self, method, body=b'', path='/'):
+        environ = {
+            'REQUEST_METHOD': method,
+            'PATH_INFO': path,
+            'SCRIPT_NAME': '',
+            'QUERY_STRING': '',
+            'SERVER_NAME': 'localhost',
+            'SERVER_PORT': '80',
+            'SERVER_PROTOCOL': 'HTTP/1.1',
+            'REMOTE_ADDR': self.remote_addr,
+            'HTTP_COOKIE': '; '.join(
+                '%s=%s' % (key, morsel.coded_value) for key, morsel in self.cookies.items()
+            ),
+            'CONTENT_TYPE': 'application/x-www-form-urlencoded',
+            'CONTENT_LENGTH': str(len(body)),
+            'wsgi.version': (1, 0),
+            'wsgi.url_scheme': 'http',
+            'wsgi.input': io.BytesIO(body),
+            'wsgi.errors': sys.stderr,
+            'wsgi.multithread': True,
+            'wsgi.multiprocess': True,
+            'wsgi.run_once': False,
+        }
+        status_headers = []
+
+        def start_response(status, headers, exc_info=None):
+            status_headers[:] = [status, headers]
+
+        result = self.application(environ, start_response)
+        try:
+            content = b''.join(result)
+        finally:
+            if hasattr(result, 'close'):
+                result.close()
+        status, headers = status_headers
+        for name, value in headers:
+            if name.lower() == 'set-cookie':
+                self.cookies.load(value)
+        return int(status.split()[0]), content
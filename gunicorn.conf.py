@@ -0,0 +1,40 @@
+"""
+Gunicorn configuration for the portfolio site.
+
+The app is imported and warmed up once in the master (see Base/warmup.py) and
+the workers are forked from it, so they share its memory copy-on-write and
+serve their first request without importing Django or compiling templates.
+"""
+
+import gc
+import os
+
+# bind and workers keep gunicorn's defaults, which already honour $PORT and
+# $WEB_CONCURRENCY.
+wsgi_app = "portfolio.wsgi:application"
+preload_app = os.environ.get("GUNICORN_PRELOAD", "True").lower() == "true"
+
+
+def when_ready(server):
+    # Move everything loaded so far out of the collector's reach, so garbage
+    # collection in the workers does not touch (and copy) the shared pages.
+    gc.freeze()
+
+
+def post_fork(server, worker):
+    from django.conf import settings
+    from django.db import connections
+
+    # Each worker opens its own connections; none may be inherited from the
+    # master. Without preload_app, Django is not set up yet at this point.
+    if settings.configured:
+        connections.close_all()
+
+
+def worker_exit(server, worker):
+    from django.conf import settings
+
+    if settings.configured and settings.CONTACT_QUEUE_ENABLED:
+        from Base import submissions
+
+        submissions.get_queue().close()
@@ -52,14 +52,15 @@ INSTALLED_APPS = [
 ]
 
 MIDDLEWARE = [
+    "Base.metrics.ServerTimingMiddleware",
     "django.middleware.security.SecurityMiddleware",
+    "whitenoise.middleware.WhiteNoiseMiddleware",
     "django.contrib.sessions.middleware.SessionMiddleware",
     "django.middleware.common.CommonMiddleware",
     "django.middleware.csrf.CsrfViewMiddleware",
     "django.contrib.auth.middleware.AuthenticationMiddleware",
     "django.contrib.messages.middleware.MessageMiddleware",
     "django.middleware.clickjacking.XFrameOptionsMiddleware",
-    "whitenoise.middleware.WhiteNoiseMiddleware",
 ]
 
 ROOT_URLCONF = "portfolio.urls"
@@ -68,8 +69,19 @@ TEMPLATES = [
     {
         "BACKEND": "django.template.backends.django.DjangoTemplates",
         "DIRS": [],
-        "APP_DIRS": True,
         "OPTIONS": {
+            # Compiled templates are cached per process. The project's own
+            # templates are minified on load (see Base/loaders.py); admin
+            # templates are loaded untouched.
+            "loaders": [
+                (
+                    "django.template.loaders.cached.Loader",
+                    [
+                        ("Base.loaders.Loader", [BASE_DIR / "Base" / "templates"]),
+                        "django.template.loaders.app_directories.Loader",
+                    ],
+                ),
+            ],
             "context_processors": [
                 "django.template.context_processors.debug",
                 "django.template.context_processors.request",
@@ -86,12 +98,129 @@ WSGI_APPLICATION = "portfolio.wsgi.application"
 # Database
 # https://docs.djangoproject.com/en/5.1/ref/settings/#databases
 
-DATABASES = {
-    "default": dj_database_url.config(
-        default=f"sqlite:///{BASE_DIR / 'db.sqlite3'}",
-        conn_max_age=600, # Optional: keep connections alive for 10 min
-        ssl_require=True, # Recommended for secure connections
-    )
+DATABASE_URL = os.environ.get("DATABASE_URL", f"sqlite:///{BASE_DIR / 'db.sqlite3'}")
+
+if DATABASE_URL.startswith("sqlite"):
+    # SQLite profile: the pragmas in SQLITE_PRAGMAS are applied to every new
+    # connection (see Base/sqlite.py), and transactions take the write lock
+    # up front so concurrent writers wait on busy_timeout instead of failing
+    # with "database is locked" when upgrading a read lock.
+    DATABASES = {
+        "default": dj_database_url.parse(DATABASE_URL, conn_max_age=600),
+    }
+    DATABASES["default"]["OPTIONS"] = {
+        "transaction_mode": "IMMEDIATE",
+        "timeout": 20,
+    }
+else:
+    DATABASES = {
+        "default": dj_database_url.parse(
+            DATABASE_URL,
+            conn_max_age=600, # Optional: keep connections alive for 10 min
+            ssl_require=True, # Recommended for secure connections
+        )
+    }
+
+SQLITE_PRAGMAS = {
+    "journal_mode": "WAL",
+    "synchronous": "NORMAL",
+    "busy_timeout": 20000,  # milliseconds
+    "mmap_size": 128 * 1024 * 1024,
+    "cache_size": -20000,  # KiB
+    "temp_store": "MEMORY",
+}
+
+
+# Lean anonymous mode: flash messages live in a signed cookie instead of the
+# session, so an anonymous visit never creates, reads or writes a session row.
+# Sessions themselves stay in the database, so admin logins can still be
+# revoked server-side.
+
+LEAN_ANONYMOUS = os.environ.get("LEAN_ANONYMOUS", "True").lower() == "true"
+if LEAN_ANONYMOUS:
+    MESSAGE_STORAGE = "django.contrib.messages.storage.cookie.CookieStorage"
+
+
+# Contact submission queue (see Base/submissions.py). When enabled, valid
+# submissions are spooled and written in batches instead of one INSERT each.
+
+CONTACT_QUEUE_ENABLED = os.environ.get("CONTACT_QUEUE_ENABLED", "False").lower() == "true"
+CONTACT_QUEUE_BATCH_SIZE = 50
+CONTACT_QUEUE_FLUSH_INTERVAL = 2.0  # seconds
+CONTACT_QUEUE_SPOOL_DIR = BASE_DIR / "spool"
+
+
+# Caches. "throttle" holds token buckets and recent-submission hashes for
+# the contact form; LocMemCache culls least-recently-used keys when full.
+# LocMemCache is per process: with several gunicorn workers each one has its
+# own buckets, so the limits below apply per worker. Set THROTTLE_REDIS_URL
+# (requires the redis package) to share them between workers.
+
+CACHES = {
+    "default": {
+        "BACKEND": "django.core.cache.backends.locmem.LocMemCache",
+    },
+    "throttle": {
+        "BACKEND": "django.core.cache.backends.locmem.LocMemCache",
+        "LOCATION": "throttle",
+        "OPTIONS": {"MAX_ENTRIES": 10000, "CULL_FREQUENCY": 4},
+    },
+}
+
+THROTTLE_REDIS_URL = os.environ.get("THROTTLE_REDIS_URL")
+if THROTTLE_REDIS_URL:
+    CACHES["throttle"] = {
+        "BACKEND": "django.core.cache.backends.redis.RedisCache",
+        "LOCATION": THROTTLE_REDIS_URL,
+    }
+
+
+# Contact form throttling (see Base/throttle.py). Each client IP and each
+# email may send CONTACT_THROTTLE_BURST messages at once, refilled at
+# CONTACT_THROTTLE_RATE per second; identical messages from the same email are
+# dropped for CONTACT_DUPLICATE_WINDOW seconds.
+#
+# Behind a reverse proxy REMOTE_ADDR is the proxy's address. Set
+# TRUSTED_PROXY_COUNT to the number of proxies in front of the app (1 on
+# Render) so the client address is taken from X-Forwarded-For instead.
+
+CONTACT_THROTTLE_ENABLED = os.environ.get("CONTACT_THROTTLE_ENABLED", "True").lower() == "true"
+CONTACT_THROTTLE_CACHE = "throttle"
+CONTACT_THROTTLE_RATE = 1 / 60
+CONTACT_THROTTLE_BURST = 5
+CONTACT_DUPLICATE_WINDOW = 60 * 60
+TRUSTED_PROXY_COUNT = int(os.environ.get("TRUSTED_PROXY_COUNT", "0"))
+
+
+# Request metrics (see Base/metrics.py): samples kept per worker between
+# scrapes of /metrics. The endpoint answers only clients in
+# METRICS_ALLOWED_IPS (see TRUSTED_PROXY_COUNT) or presenting
+# "Authorization: Bearer <METRICS_TOKEN>"; everyone else gets a 404.
+
+METRICS_RING_SIZE = 10000
+METRICS_ENABLED = os.environ.get("METRICS_ENABLED", "True").lower() == "true"
+METRICS_ALLOWED_IPS = [
+    ip.strip()
+    for ip in os.environ.get("METRICS_ALLOWED_IPS", "127.0.0.1,::1").split(",")
+    if ip.strip()
+]
+METRICS_TOKEN = os.environ.get("METRICS_TOKEN", "")
+
+
+# Logging. Contact form outcomes are logged by Base.views at INFO.
+
+LOGGING = {
+    "version": 1,
+    "disable_existing_loggers": False,
+    "handlers": {
+        "console": {"class": "logging.StreamHandler"},
+    },
+    "loggers": {
+        "Base": {
+            "handlers": ["console"],
+            "level": os.environ.get("BASE_LOG_LEVEL", "WARNING"),
+        },
+    },
 }
 
 
@@ -133,8 +262,44 @@ STATIC_URL = "static/"
 STATICFILES_DIRS = [
     os.path.join(BASE_DIR, "static"),
 ]
-STATIC_ROOT = os.path.join(BASE_DIR, "staticfiles")
-STATICFILES_STORAGE = 'whitenoise.storage.CompressedManifestStaticFilesStorage'
+STATIC_ROOT = os.environ.get("STATIC_ROOT", os.path.join(BASE_DIR, "staticfiles"))
+# STATICFILES_STORAGE is no longer read by Django 5.1; STORAGES replaces it.
+STORAGES = {
+    "default": {
+        "BACKEND": "django.core.files.storage.FileSystemStorage",
+    },
+    "staticfiles": {
+        "BACKEND": "Base.storage.ResponsiveStaticFilesStorage",
+    },
+}
+
+# Prerendered page (see Base/management/commands/prerender.py). When enabled,
+# WhiteNoise serves PRERENDER_ROOT at the site root, so GET / never reaches
+# Django; run "manage.py prerender" after collectstatic on every deploy.
+
+PRERENDER_ROOT = BASE_DIR / "prerender"
+PRERENDER_ENABLED = os.environ.get("PRERENDER_ENABLED", "False").lower() == "true"
+if PRERENDER_ENABLED:
+    WHITENOISE_ROOT = PRERENDER_ROOT
+    WHITENOISE_INDEX_FILE = True
+
+# Pre-fork warm-up run by portfolio/wsgi.py (see Base/warmup.py)
+
+WARMUP_ENABLED = os.environ.get("WARMUP_ENABLED", "True").lower() == "true"
+WARMUP_TEMPLATES = ["home.html"]
+
+# Responsive image variants built during collectstatic (see Base/storage.py)
+RESPONSIVE_IMAGE_PREFIX = "images/"
+RESPONSIVE_IMAGE_WIDTHS = [320, 480, 640]
+RESPONSIVE_IMAGE_FORMATS = ["avif", "webp"]
+RESPONSIVE_IMAGE_INDEX = "responsive-images.json"
+
+
+# Full-page cache for the portfolio page (see Base/page_cache.py)
+
+PAGE_CACHE_ENABLED = os.environ.get("PAGE_CACHE_ENABLED", "True").lower() == "true"
+PAGE_CACHE_ALIAS = "default"
+PAGE_CACHE_TIMEOUT = None  # entries are keyed by template mtime and manifest hash
 
 
 # Default primary key field type
@@ -9,8 +9,16 @@ https://docs.djangoproject.com/en/5.1/howto/deployment/wsgi/
 
 import os
 
+from django.conf import settings
 from django.core.wsgi import get_wsgi_application
 
 os.environ.setdefault("DJANGO_SETTINGS_MODULE", "portfolio.settings")
 
 application = get_wsgi_application()
+
+if settings.WARMUP_ENABLED:
+    # Runs once in the gunicorn master when preload_app is on (see
+    # gunicorn.conf.py), so forked workers start with warm caches.
+    from Base.warmup import warm_up
+
+    warm_up()